@@ -4,7 +4,9 @@ Agent 6: Exception Case Manager
 Agent 7: Courier Dispatch Agent
 Agent 8: Passenger Communication Agent
 """
+import asyncio
 import json
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
 from langchain_anthropic import ChatAnthropic
@@ -14,6 +16,7 @@ import xmltodict
 
 from models.baggage_models import ExceptionCase, CourierDispatch, PassengerNotification, RiskLevel
 from config.settings import settings
+from gateway.cache_manager import CacheManager, CacheConfig, generate_cache_key
 from utils.database import supabase_db, redis_cache
 
 
@@ -324,6 +327,11 @@ Return ONLY valid JSON."""
 # AGENT 8: Passenger Communication Agent
 # ============================================================================
 
+# Crafted passenger messages kept for retries and repeat notifications
+PASSENGER_MESSAGE_CACHE_SIZE = 4096
+PASSENGER_MESSAGE_CACHE_TTL_SECONDS = 900
+
+
 class PassengerCommunicationAgent:
     """
     Multi-channel passenger notifications
@@ -335,6 +343,16 @@ class PassengerCommunicationAgent:
             temperature=0.7,  # More creative for messaging
             api_key=settings.anthropic_api_key
         )
+        # Messages depend only on the prompt inputs, so a retry or repeat
+        # notification for the same bag and situation reuses them instead
+        # of another LLM round trip
+        self._message_cache = CacheManager(
+            "passenger_messages",
+            CacheConfig(
+                max_size=PASSENGER_MESSAGE_CACHE_SIZE,
+                default_ttl_seconds=PASSENGER_MESSAGE_CACHE_TTL_SECONDS
+            )
+        )
         logger.info("PassengerCommunicationAgent initialized")
     
     async def send_proactive_notification(self, bag_data: Dict, risk_data: Dict) -> Dict[str, Any]:
@@ -364,7 +382,21 @@ class PassengerCommunicationAgent:
             raise
     
     async def _craft_messages(self, bag_data: Dict, risk_data: Dict) -> Dict[str, str]:
-        """AI crafts empathetic, solution-focused messages"""
+        """AI crafts empathetic, solution-focused messages (cached per bag and situation)"""
+        cache_key = generate_cache_key(
+            "proactive",
+            bag_tag=bag_data.get('bag_tag'),
+            passenger_name=bag_data['passenger']['name'],
+            elite_status=bag_data['passenger'].get('elite_status'),
+            situation_summary=risk_data.get('situation_summary'),
+            expected_resolution=risk_data.get('expected_resolution')
+        )
+        # The cache holds the model's JSON text, so every call returns a
+        # fresh dict that callers may add per-channel fields to
+        cached = self._message_cache.get(cache_key)
+        if cached is not None:
+            return json.loads(cached)
+
         prompt = f"""Craft passenger notification for delayed bag:
 
 Passenger: {bag_data['passenger']['name']}
@@ -404,59 +436,64 @@ Return JSON:
 Return ONLY valid JSON."""
 
         response = await self.llm.ainvoke([{"role": "user", "content": prompt}])
-        return json.loads(response.content)
+        messages = json.loads(response.content)
+        self._message_cache.set(cache_key, response.content)
+        return messages
     
     async def _send_multi_channel(self, passenger: Dict, messages: Dict) -> Dict[str, str]:
-        """Send via SMS, Email, Push"""
-        delivery_status = {}
-        
-        # SMS
+        """Send via SMS, Email, Push (channels are sent concurrently)"""
+        async def send_sms():
+            await self._send_sms(passenger['phone'], messages['sms'])
+
+        async def send_email():
+            await self._send_email(
+                passenger['email'],
+                messages['email_subject'],
+                messages['email_body']
+            )
+
+        async def send_push():
+            await self._send_push(passenger['user_id'], messages['push'])
+
+        # (channel, send, failure log label) for each channel the passenger has
+        channels = []
         if passenger.get('phone'):
-            try:
-                await self._send_sms(passenger['phone'], messages['sms'])
-                delivery_status['sms'] = 'delivered'
-            except Exception as e:
-                logger.error(f"SMS delivery failed: {str(e)}")
-                delivery_status['sms'] = 'failed'
-        
-        # Email
+            channels.append(('sms', send_sms, "SMS delivery failed"))
         if passenger.get('email'):
-            try:
-                await self._send_email(
-                    passenger['email'],
-                    messages['email_subject'],
-                    messages['email_body']
-                )
-                delivery_status['email'] = 'delivered'
-            except Exception as e:
-                logger.error(f"Email delivery failed: {str(e)}")
-                delivery_status['email'] = 'failed'
-        
-        # Push notification
+            channels.append(('email', send_email, "Email delivery failed"))
         if passenger.get('user_id'):
-            try:
-                await self._send_push(passenger['user_id'], messages['push'])
-                delivery_status['push'] = 'delivered'
-            except Exception as e:
-                logger.error(f"Push notification failed: {str(e)}")
-                delivery_status['push'] = 'failed'
-        
+            channels.append(('push', send_push, "Push notification failed"))
+
+        # Total latency is the slowest channel rather than the sum of all three
+        results = await asyncio.gather(
+            *(send() for _, send, _ in channels),
+            return_exceptions=True
+        )
+
+        delivery_status = {}
+        for (channel, _, failure_label), result in zip(channels, results):
+            if isinstance(result, BaseException):
+                logger.opt(exception=result).error("{}", failure_label)
+                delivery_status[channel] = 'failed'
+            else:
+                delivery_status[channel] = 'delivered'
+
         return delivery_status
     
     async def _send_sms(self, phone: str, message: str):
         """Send SMS via Twilio"""
         # In production, would use Twilio API
-        logger.info(f"SMS sent to {phone}: {message[:50]}...")
+        logger.info("SMS sent to {}: {}...", phone, message[:50])
     
     async def _send_email(self, email: str, subject: str, body: str):
         """Send email via SendGrid"""
         # In production, would use SendGrid API
-        logger.info(f"Email sent to {email}: {subject}")
+        logger.info("Email sent to {}: {}", email, subject)
     
     async def _send_push(self, user_id: str, message: str):
         """Send push notification via Firebase"""
         # In production, would use Firebase API
-        logger.info(f"Push notification sent to user {user_id}")
+        logger.info("Push notification sent to user {}", user_id)
     
     async def _log_notification(self, bag_data: Dict, messages: Dict, delivery_status: Dict):
         """Log notification in database"""
@@ -474,8 +511,26 @@ Return ONLY valid JSON."""
         supabase_db.log_notification(notification_data)
 
 
-# Agent instances
-baggage_xml_agent = BaggageXMLAgent()
-case_manager_agent = ExceptionCaseAgent()
-courier_dispatch_agent = CourierDispatchAgent()
-passenger_comms_agent = PassengerCommunicationAgent()
+# Agent instances, built on first access (PEP 562) so importing this module
+# doesn't construct four LLM clients and the message cache up front
+_AGENT_CLASSES = {
+    "baggage_xml_agent": BaggageXMLAgent,
+    "case_manager_agent": ExceptionCaseAgent,
+    "courier_dispatch_agent": CourierDispatchAgent,
+    "passenger_comms_agent": PassengerCommunicationAgent,
+}
+_agents: Dict[str, Any] = {}
+_agents_lock = threading.Lock()
+
+
+def __getattr__(name: str) -> Any:
+    """Lazily construct the module-level agent instances"""
+    if name in _AGENT_CLASSES:
+        agent = _agents.get(name)
+        if agent is None:
+            with _agents_lock:
+                agent = _agents.get(name)
+                if agent is None:
+                    agent = _agents[name] = _AGENT_CLASSES[name]()
+        return agent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -13,6 +13,27 @@ from config.settings import settings
 from utils.database import neo4j_db, supabase_db, redis_cache
 
 
+# Simplified MCT lookup (minutes) by connection type
+DEFAULT_MCT = {
+    'domestic': 45,
+    'international': 60,
+    'international_to_domestic': 75,
+    'domestic_to_international': 90
+}
+FALLBACK_MCT = 60
+
+# Historical airport performance scores (0-10), mock data
+AIRPORT_SCORES = {
+    'PTY': 8.5,  # Copa hub - excellent
+    'MIA': 7.2,
+    'JFK': 6.8,
+    'EWR': 6.5,
+    'ORD': 6.9,
+    'LHR': 7.5,
+}
+DEFAULT_AIRPORT_SCORE = 7.0
+
+
 class BaggageRiskScoringAgent:
     """
     Agent responsible for:
@@ -253,29 +274,14 @@ Return ONLY valid JSON."""
         """Get Minimum Connection Time for airport"""
         # Simplified MCT lookup
         # In production, would query actual MCT database by airport and connection type
-        default_mct = {
-            'domestic': 45,
-            'international': 60,
-            'international_to_domestic': 75,
-            'domestic_to_international': 90
-        }
-        return default_mct.get(connection_type, 60)
+        return DEFAULT_MCT.get(connection_type, FALLBACK_MCT)
     
     async def _get_airport_performance(self, airport_code: str) -> float:
         """Get historical airport performance score (0-10)"""
         # In production, would query historical data
         # For now, return mock data
-        airport_scores = {
-            'PTY': 8.5,  # Copa hub - excellent
-            'MIA': 7.2,
-            'JFK': 6.8,
-            'EWR': 6.5,
-            'ORD': 6.9,
-            'LHR': 7.5,
-            'default': 7.0
-        }
         code = airport_code.split('-')[0]  # Extract airport code from location
-        return airport_scores.get(code, airport_scores['default'])
+        return AIRPORT_SCORES.get(code, DEFAULT_AIRPORT_SCORE)
     
     async def _get_historical_mishandling_rate(self, routing: list) -> float:
         """Get historical mishandling rate for this route"""
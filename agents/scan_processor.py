@@ -233,16 +233,12 @@ Return ONLY valid JSON."""
                 'created_at': scan_event['timestamp']
             }
             neo4j_db.create_digital_twin(bag_data)
+            
+            # Add scan event to journey
+            neo4j_db.add_scan_event(bag_tag, scan_event)
         else:
-            # Update existing twin
-            neo4j_db.update_bag_location(
-                bag_tag,
-                scan_event['location'],
-                scan_event['status']
-            )
-        
-        # Add scan event to journey
-        neo4j_db.add_scan_event(bag_tag, scan_event)
+            # Update existing twin and add scan event to journey together
+            neo4j_db.record_scan(bag_tag, scan_event)
         
         logger.info(f"Digital twin updated for bag {bag_tag}")
     
@@ -676,7 +676,7 @@ class SemanticScanProcessor:
             description=f"Pattern detected: {correlation.reasoning}",
             detected_anomalies=[correlation.pattern_type or 'unknown'],
             requires_manual_intervention=correlation.requires_batch_action,
-            recommended_actions=correlation.recommended_actions
+            recommended_actions=correlation.recommended_actions or []
         )
 
         return message
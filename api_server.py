@@ -297,7 +297,7 @@ async def get_bag_status(bag_tag: str):
         import psycopg2
         from psycopg2.extras import RealDictCursor
 
-        neon_url = settings.neon_database_url if hasattr(settings, 'neon_database_url') else None
+        neon_url = settings.neon_database_url
 
         if not neon_url:
             raise HTTPException(status_code=503, detail="Database not configured")
@@ -336,7 +336,7 @@ async def list_bags(risk_threshold: float = None, status: str = None, limit: int
         import psycopg2
         from psycopg2.extras import RealDictCursor
 
-        neon_url = settings.neon_database_url if hasattr(settings, 'neon_database_url') else None
+        neon_url = settings.neon_database_url
 
         if not neon_url:
             raise HTTPException(status_code=503, detail="Database not configured")
@@ -386,7 +386,7 @@ async def get_dashboard_stats():
         import psycopg2
         from psycopg2.extras import RealDictCursor
 
-        neon_url = settings.neon_database_url if hasattr(settings, 'neon_database_url') else None
+        neon_url = settings.neon_database_url
 
         if not neon_url:
             raise HTTPException(status_code=503, detail="Database not configured")
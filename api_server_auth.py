@@ -435,7 +435,7 @@ async def get_bag_status(
         import psycopg2
         from psycopg2.extras import RealDictCursor
 
-        neon_url = settings.neon_database_url if hasattr(settings, 'neon_database_url') else None
+        neon_url = settings.neon_database_url
 
         if not neon_url:
             raise HTTPException(status_code=503, detail="Database not configured")
@@ -487,7 +487,7 @@ async def list_bags(
         import psycopg2
         from psycopg2.extras import RealDictCursor
 
-        neon_url = settings.neon_database_url if hasattr(settings, 'neon_database_url') else None
+        neon_url = settings.neon_database_url
 
         if not neon_url:
             raise HTTPException(status_code=503, detail="Database not configured")
@@ -541,7 +541,7 @@ async def get_dashboard_stats(
         import psycopg2
         from psycopg2.extras import RealDictCursor
 
-        neon_url = settings.neon_database_url if hasattr(settings, 'neon_database_url') else None
+        neon_url = settings.neon_database_url
 
         if not neon_url:
             raise HTTPException(status_code=503, detail="Database not configured")
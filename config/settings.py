@@ -23,6 +23,7 @@ class Settings(BaseSettings):
     neo4j_uri: str = "bolt://localhost:7687"
     neo4j_user: str = "neo4j"
     neo4j_password: str = "password"
+    neo4j_database: str = "neo4j"
 
     # PostgreSQL (Neon) - Primary database for Railway
     neon_database_url: Optional[str] = None
@@ -30,6 +31,8 @@ class Settings(BaseSettings):
     supabase_url: str = "https://placeholder.supabase.co"
     supabase_key: str = "placeholder-key"
     supabase_service_key: str = "placeholder-service-key"
+    # Direct Postgres connection string, used for COPY-based bulk loads
+    supabase_db_url: Optional[str] = None
 
     redis_url: str = "redis://localhost:6379"
 
@@ -46,6 +49,7 @@ class Settings(BaseSettings):
     twilio_account_sid: Optional[str] = None
     twilio_auth_token: Optional[str] = None
     twilio_from_number: Optional[str] = None
+    twilio_notify_service_sid: Optional[str] = None  # Notify service for bulk SMS
     
     sendgrid_api_key: Optional[str] = None
     sendgrid_from_email: Optional[str] = None
@@ -27,6 +27,7 @@ from gateway.adapters import (
     NotificationAdapter, AdapterConfig
 )
 from models.canonical_bag import CanonicalBag, AirportCode, FlightNumber, BagType
+from config.settings import settings
 
 
 async def main():
@@ -77,12 +78,17 @@ async def main():
             auth_type="api_key",
             api_key="FEDEX_KEY_HERE"
         )),
-        "notification": NotificationAdapter(AdapterConfig(
-            base_url="https://api.twilio.com",
-            auth_type="basic",
-            username="twilio_sid",
-            password="twilio_token"
-        ))
+        "notification": NotificationAdapter(
+            AdapterConfig(
+                base_url="https://api.twilio.com",
+                auth_type="basic",
+                username=settings.twilio_account_sid or "twilio_sid",
+                password=settings.twilio_auth_token or "twilio_token"
+            ),
+            notify_service_sid=settings.twilio_notify_service_sid,
+            sendgrid_api_key=settings.sendgrid_api_key,
+            sendgrid_from_email=settings.sendgrid_from_email
+        )
     }
 
     for name, adapter in adapters.items():
@@ -96,9 +96,8 @@ class BaseAdapter:
         self.stats.total_latency_ms += latency_ms
 
         logger.info(
-            f"Adapter '{self.name}.{method}': "
-            f"{'SUCCESS' if success else 'FAILED'} "
-            f"({latency_ms:.1f}ms)"
+            "Adapter '{}.{}': {} ({:.1f}ms)",
+            self.name, method, 'SUCCESS' if success else 'FAILED', latency_ms
         )
 
     def get_stats(self) -> Dict[str, Any]:
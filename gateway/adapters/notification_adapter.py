@@ -12,19 +12,242 @@ Handles:
 Version: 1.0.0
 """
 
-from typing import Dict, Any, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
+import json
+import re
+import threading
 import time
+import httpx
 from loguru import logger
 
 from gateway.adapters.base_adapter import BaseAdapter, AdapterConfig
 
+try:
+    from firebase_admin import messaging
+    FIREBASE_AVAILABLE = True
+except ImportError:
+    FIREBASE_AVAILABLE = False
+
+
+# Connection pool sizes for the shared provider HTTP client
+NOTIFICATION_MAX_KEEPALIVE_CONNECTIONS = 32
+NOTIFICATION_MAX_CONNECTIONS = 64
+
+# Connection attempts retried by the transport before a send fails
+NOTIFICATION_CONNECT_RETRIES = 2
+
+# Background workers draining enqueue()d sends
+NOTIFICATION_WORKERS = 16
+
+# Twilio Notify REST API, used for bulk SMS
+TWILIO_NOTIFY_BASE_URL = "https://notify.twilio.com/v1"
+
+# SendGrid v3 Mail Send endpoint, used for bulk email
+SENDGRID_MAIL_SEND_URL = "https://api.sendgrid.com/v3/mail/send"
+
+# SendGrid accepts at most this many personalizations (recipients) per request
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+# FCM multicast accepts at most this many device tokens per request
+FCM_MULTICAST_MAX_TOKENS = 500
+
+# Multicast requests in flight at once for large token lists
+FCM_MULTICAST_WORKERS = 4
+
+
+# Cheap client-side shape checks; anything failing them would only come back
+# as a 400 after a full provider round trip
+_E164_PHONE = re.compile(r'^\+[1-9]\d{7,14}$')
+_EMAIL_ADDRESS = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+def _invalid_recipient(channel: str, field: str, value: Any, provider: str) -> Dict[str, Any]:
+    """Result for a send skipped because the recipient is malformed"""
+    return {
+        "status": "INVALID",
+        "channel": channel,
+        field: value,
+        "provider": provider,
+        "error": f"Malformed {field}"
+    }
+
+
+def _personalization(recipient: Dict[str, Any]) -> Dict[str, Any]:
+    """SendGrid personalization for one recipient of a shared email body"""
+    to = {"email": recipient["email"]}
+    template_data = recipient.get("vars", {})
+    if recipient.get("name"):
+        to["name"] = recipient["name"]
+        if "passenger_name" not in template_data:
+            template_data = {"passenger_name": recipient["name"], **template_data}
+    return {"to": [to], "dynamic_template_data": template_data}
+
+
+# (epoch second, ISO timestamp, compact message-id stamp) for the current second
+_stamp_cache: Tuple[int, str, str] = (-1, "", "")
+
+
+def _now_stamps() -> Tuple[str, str]:
+    """
+    Current local time as (ISO string, "%Y%m%d%H%M%S" stamp)
+
+    Both are second resolution, so they are formatted once per second and
+    reused by every send in that second.
+    """
+    global _stamp_cache
+    second = int(time.time())
+    cached = _stamp_cache
+    if cached[0] != second:
+        now = datetime.fromtimestamp(second)
+        cached = _stamp_cache = (second, now.isoformat(), now.strftime('%Y%m%d%H%M%S'))
+    return cached[1], cached[2]
+
 
 class NotificationAdapter(BaseAdapter):
-    """Notification services adapter"""
+    """
+    Notification services adapter
+
+    All providers share one keep-alive HTTP client, so a burst of sends
+    reuses pooled TCP+TLS connections instead of handshaking per message.
+    Sends can also be enqueue()d to run on background workers, so a caller
+    on a request path doesn't wait on the provider round trip.
+    Call close() (or use the adapter as a context manager) on shutdown.
+    """
 
-    def __init__(self, config: AdapterConfig):
+    def __init__(
+        self,
+        config: AdapterConfig,
+        notify_service_sid: Optional[str] = None,
+        sendgrid_api_key: Optional[str] = None,
+        sendgrid_from_email: Optional[str] = None,
+        firebase_app: Optional[Any] = None
+    ):
+        """
+        Args:
+            config: Adapter configuration
+            notify_service_sid: Twilio Notify service used by send_sms_bulk
+                (settings.twilio_notify_service_sid); without one, bulk SMS
+                falls back to one send_sms per number. Requests authenticate
+                with config.username/password (account SID and auth token).
+            sendgrid_api_key: SendGrid key used by send_email_bulk
+                (settings.sendgrid_api_key); without one, bulk email is
+                not sent to SendGrid, like send_email
+            sendgrid_from_email: Sender address for bulk email
+                (settings.sendgrid_from_email)
+            firebase_app: Initialized firebase_admin App used by
+                send_push_batch; without one (or without firebase-admin
+                installed), batches are not sent to FCM, like send_push
+        """
         super().__init__("notification", config)
+        self.notify_service_sid = notify_service_sid
+        self.sendgrid_api_key = sendgrid_api_key
+        self.sendgrid_from_email = sendgrid_from_email
+        self.firebase_app = firebase_app
+        # Pool limits and TLS settings live on the transport when one is given
+        transport = httpx.HTTPTransport(
+            verify=config.verify_ssl,
+            limits=httpx.Limits(
+                max_keepalive_connections=NOTIFICATION_MAX_KEEPALIVE_CONNECTIONS,
+                max_connections=NOTIFICATION_MAX_CONNECTIONS
+            ),
+            retries=NOTIFICATION_CONNECT_RETRIES
+        )
+        self.http_client: Optional[httpx.Client] = httpx.Client(
+            timeout=config.timeout_seconds,
+            transport=transport
+        )
+        # Created on first enqueue()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Finish queued sends and close the pooled HTTP client (safe to call more than once)"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+        if self.http_client:
+            self.http_client.close()
+            self.http_client = None
+            logger.info("Notification adapter HTTP client closed")
+
+    def _log_call(self, method: str, success: bool, latency_ms: float, error: Optional[str] = None):
+        """Log adapter call (stats may be updated from background workers)"""
+        with self._stats_lock:
+            super()._log_call(method, success, latency_ms, error)
+
+    def enqueue(self, method: str, **params) -> Future:
+        """
+        Queue a send to run on a background worker and return immediately
+
+        Args:
+            method: Send method name, e.g. "send_sms" or "send_email_bulk"
+            **params: Arguments for that method
+
+        Returns:
+            Future resolving to the method's result (or raising its error)
+        """
+        send = getattr(self, method, None)
+        if not method.startswith("send_") or send is None:
+            raise ValueError(f"Unknown notification method: {method}")
+
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=NOTIFICATION_WORKERS,
+                    thread_name_prefix="notification"
+                )
+            return self._executor.submit(send, **params)
+
+    def send_multi_channel(
+        self,
+        sms: Optional[Dict[str, Any]] = None,
+        email: Optional[Dict[str, Any]] = None,
+        push: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Send over several channels at once from synchronous code
+
+        Each argument holds the keyword arguments for send_sms, send_email or
+        send_push; channels left as None are skipped. The sends run on their
+        own short-lived threads (not the enqueue() workers, which may be
+        the caller), so latency is the slowest channel rather than the sum.
+        A failing channel is reported without affecting the others.
+        """
+        sends = {
+            channel: (method, params)
+            for channel, method, params in (
+                ("sms", self.send_sms, sms),
+                ("email", self.send_email, email),
+                ("push", self.send_push, push),
+            )
+            if params is not None
+        }
+        if not sends:
+            return {"channels": {}}
+
+        with ThreadPoolExecutor(max_workers=len(sends)) as pool:
+            futures = {
+                channel: pool.submit(method, **params)
+                for channel, (method, params) in sends.items()
+            }
+
+        channels: Dict[str, Any] = {}
+        for channel, future in futures.items():
+            try:
+                channels[channel] = future.result()
+            except Exception as e:
+                channels[channel] = {"status": "FAILED", "channel": channel, "error": str(e)}
+        return {"channels": channels}
 
     def send_sms(
         self,
@@ -32,19 +255,23 @@ class NotificationAdapter(BaseAdapter):
         message: str,
         priority: str = "NORMAL"
     ) -> Dict[str, Any]:
-        """Send SMS via Twilio"""
+        """Send SMS via Twilio (malformed numbers are rejected without a request)"""
+        if not isinstance(phone, str) or not _E164_PHONE.match(phone):
+            return _invalid_recipient("sms", "phone", phone, "twilio")
+
         start_time = time.time()
 
         try:
-            logger.info(f"Sending SMS to {phone[:4]}****{phone[-4:]}")
+            logger.info("Sending SMS to {}****{}", phone[:4], phone[-4:])
 
-            message_id = f"SM{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            sent_at, stamp = _now_stamps()
+            message_id = f"SM{stamp}"
 
             result = {
                 "message_id": message_id,
                 "status": "SENT",
                 "phone": phone,
-                "sent_at": datetime.now().isoformat(),
+                "sent_at": sent_at,
                 "provider": "twilio"
             }
 
@@ -57,6 +284,87 @@ class NotificationAdapter(BaseAdapter):
             self._log_call("send_sms", False, latency, str(e))
             raise
 
+    def send_sms_bulk(
+        self,
+        phones: List[str],
+        message: str
+    ) -> Dict[str, Any]:
+        """
+        Send the same SMS to many numbers
+
+        With a Twilio Notify service configured this is one request for the
+        whole list; otherwise each number goes through send_sms. Repeated
+        numbers are sent once.
+
+        Returns:
+            notification_id (the Notify notification SID, None without
+            Notify), recipients (numbers sent to), sent_at, provider, and
+            statuses: a status per distinct number, keyed by str(phone) in
+            input order, with malformed numbers reported as INVALID
+        """
+        statuses: Dict[str, str] = {}
+        valid_phones: List[str] = []
+        for phone in phones:
+            key = str(phone)
+            if key in statuses:
+                continue
+            if isinstance(phone, str) and _E164_PHONE.match(phone):
+                valid_phones.append(phone)
+                statuses[key] = "PENDING"
+            else:
+                statuses[key] = "INVALID"
+
+        sent_at, _ = _now_stamps()
+        notification_id = None
+        if valid_phones and self.notify_service_sid:
+            notification_id = self._send_notify_sms(valid_phones, message)
+            for phone in valid_phones:
+                statuses[phone] = "SENT"
+        else:
+            for phone in valid_phones:
+                try:
+                    statuses[phone] = self.send_sms(phone, message)["status"]
+                except Exception:
+                    statuses[phone] = "FAILED"
+
+        return {
+            "notification_id": notification_id,
+            "recipients": len(valid_phones),
+            "sent_at": sent_at,
+            "provider": "twilio",
+            "statuses": statuses
+        }
+
+    def _send_notify_sms(self, phones: List[str], message: str) -> Optional[str]:
+        """Send one Twilio Notify request to every number and return its SID"""
+        start_time = time.time()
+
+        try:
+            logger.info("Sending SMS to {} numbers via Notify", len(phones))
+
+            to_binding = [
+                json.dumps({"binding_type": "sms", "address": phone})
+                for phone in phones
+            ]
+
+            # One Notifications request fans out to every binding
+            response = self.http_client.post(
+                f"{TWILIO_NOTIFY_BASE_URL}/Services/{self.notify_service_sid}/Notifications",
+                data={"ToBinding": to_binding, "Body": message},
+                auth=(self.config.username or "", self.config.password or "")
+            )
+            response.raise_for_status()
+            notification = response.json()
+
+            latency = (time.time() - start_time) * 1000
+            self._log_call("send_sms_bulk", True, latency)
+            return notification.get("sid")
+
+        except Exception as e:
+            latency = (time.time() - start_time) * 1000
+            self._log_call("send_sms_bulk", False, latency, str(e))
+            raise
+
     def send_email(
         self,
         email: str,
@@ -64,20 +372,24 @@ class NotificationAdapter(BaseAdapter):
         body: str,
         template: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Send email via SendGrid"""
+        """Send email via SendGrid (malformed addresses are rejected without a request)"""
+        if not isinstance(email, str) or not _EMAIL_ADDRESS.match(email):
+            return _invalid_recipient("email", "email", email, "sendgrid")
+
         start_time = time.time()
 
         try:
-            logger.info(f"Sending email to {email}")
+            logger.info("Sending email to {}", email)
 
-            message_id = f"EM{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            sent_at, stamp = _now_stamps()
+            message_id = f"EM{stamp}"
 
             result = {
                 "message_id": message_id,
                 "status": "SENT",
                 "email": email,
                 "subject": subject,
-                "sent_at": datetime.now().isoformat(),
+                "sent_at": sent_at,
                 "provider": "sendgrid"
             }
 
@@ -90,6 +402,94 @@ class NotificationAdapter(BaseAdapter):
             self._log_call("send_email", False, latency, str(e))
             raise
 
+    def send_email_bulk(
+        self,
+        recipients: List[Dict[str, Any]],
+        subject: str,
+        body: str,
+        template: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Send the same email to many recipients via SendGrid personalizations
+
+        Each recipient dict has "email" and optionally "name" and "vars"
+        (per-recipient template data). The body is shared by the whole
+        list: a recipient's name is passed as passenger_name template data,
+        so with a dynamic template SendGrid fills in "{{passenger_name}}"
+        rather than a body being rendered per recipient. One request covers
+        up to SENDGRID_MAX_PERSONALIZATIONS recipients and SendGrid fans out
+        server-side, instead of one request per address. Recipients with a
+        malformed address are left out and counted as invalid.
+        """
+        valid = [
+            r for r in recipients
+            if isinstance(r.get("email"), str) and _EMAIL_ADDRESS.match(r["email"])
+        ]
+        invalid_count = len(recipients) - len(valid)
+        recipients = valid
+        results: List[Dict[str, Any]] = []
+
+        for i in range(0, len(recipients), SENDGRID_MAX_PERSONALIZATIONS):
+            chunk = recipients[i:i + SENDGRID_MAX_PERSONALIZATIONS]
+            start_time = time.time()
+
+            try:
+                logger.info("Sending email to {} recipients", len(chunk))
+
+                sent_at, stamp = _now_stamps()
+                message_id = f"EB{stamp}"
+                if self.sendgrid_api_key:
+                    message_id = self._send_sendgrid_batch(chunk, subject, body, template) or message_id
+
+                results.append({
+                    "message_id": message_id,
+                    "status": "SENT",
+                    "recipients": len(chunk),
+                    "subject": subject,
+                    "sent_at": sent_at,
+                    "provider": "sendgrid"
+                })
+
+                latency = (time.time() - start_time) * 1000
+                self._log_call("send_email_bulk", True, latency)
+
+            except Exception as e:
+                latency = (time.time() - start_time) * 1000
+                self._log_call("send_email_bulk", False, latency, str(e))
+                raise
+
+        return {
+            "recipients": len(recipients),
+            "invalid": invalid_count,
+            "requests": len(results),
+            "results": results
+        }
+
+    def _send_sendgrid_batch(
+        self,
+        recipients: List[Dict[str, Any]],
+        subject: str,
+        body: str,
+        template: Optional[str] = None
+    ) -> Optional[str]:
+        """Send one SendGrid request to every recipient and return its message id"""
+        message = {
+            "personalizations": [_personalization(r) for r in recipients],
+            "from": {"email": self.sendgrid_from_email},
+            "subject": subject,
+            "content": [{"type": "text/html", "value": body}]
+        }
+        if template:
+            message["template_id"] = template
+
+        response = self.http_client.post(
+            SENDGRID_MAIL_SEND_URL,
+            json=message,
+            headers={"Authorization": f"Bearer {self.sendgrid_api_key}"}
+        )
+        response.raise_for_status()
+        return response.headers.get("X-Message-Id")
+
     def send_push(
         self,
         device_token: str,
@@ -101,14 +501,15 @@ class NotificationAdapter(BaseAdapter):
         start_time = time.time()
 
         try:
-            logger.info(f"Sending push notification to device {device_token[:10]}...")
+            logger.info("Sending push notification to device {}...", device_token[:10])
 
-            message_id = f"PN{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            sent_at, stamp = _now_stamps()
+            message_id = f"PN{stamp}"
 
             result = {
                 "message_id": message_id,
                 "status": "SENT",
-                "sent_at": datetime.now().isoformat(),
+                "sent_at": sent_at,
                 "provider": "firebase"
             }
 
@@ -120,3 +521,102 @@ class NotificationAdapter(BaseAdapter):
             latency = (time.time() - start_time) * 1000
             self._log_call("send_push", False, latency, str(e))
             raise
+
+    def send_push_batch(
+        self,
+        device_tokens: List[str],
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Send one push notification to many devices via Firebase multicast
+
+        Tokens are sent FCM_MULTICAST_MAX_TOKENS per request instead of one
+        request per device; larger lists are split and the chunks sent
+        concurrently. data goes out as every message's FCM data payload,
+        with values converted to strings. Returns per-token results in
+        input order.
+        """
+        chunks = [
+            device_tokens[i:i + FCM_MULTICAST_MAX_TOKENS]
+            for i in range(0, len(device_tokens), FCM_MULTICAST_MAX_TOKENS)
+        ]
+        if not chunks:
+            return {"success_count": 0, "failure_count": 0, "responses": []}
+
+        logger.info("Sending push notification to {} devices in {} batches", len(device_tokens), len(chunks))
+
+        def send_chunk(tokens: List[str]):
+            start_time = time.time()
+            try:
+                responses = self._send_push_multicast(tokens, title, body, data)
+                return responses, (time.time() - start_time) * 1000, None
+            except Exception as e:
+                return None, (time.time() - start_time) * 1000, e
+
+        if len(chunks) == 1:
+            outcomes = [send_chunk(chunks[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(chunks), FCM_MULTICAST_WORKERS)) as pool:
+                outcomes = list(pool.map(send_chunk, chunks))
+
+        # Stats are updated here, on the calling thread
+        responses: List[Dict[str, Any]] = []
+        for tokens, (chunk_responses, latency, error) in zip(chunks, outcomes):
+            self._log_call("send_push_batch", error is None, latency, str(error) if error else None)
+            if error is not None:
+                chunk_responses = [
+                    {"device_token": token, "status": "FAILED", "error": str(error), "provider": "firebase"}
+                    for token in tokens
+                ]
+            responses.extend(chunk_responses)
+
+        success_count = sum(1 for r in responses if r["status"] == "SENT")
+        return {
+            "success_count": success_count,
+            "failure_count": len(responses) - success_count,
+            "responses": responses
+        }
+
+    def _send_push_multicast(
+        self,
+        device_tokens: List[str],
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Send one FCM multicast request (at most FCM_MULTICAST_MAX_TOKENS tokens)"""
+        sent_at, stamp = _now_stamps()
+
+        if FIREBASE_AVAILABLE and self.firebase_app is not None:
+            # FCM data payloads only carry string values
+            message = messaging.MulticastMessage(
+                tokens=device_tokens,
+                notification=messaging.Notification(title=title, body=body),
+                data={str(key): str(value) for key, value in (data or {}).items()}
+            )
+            batch = messaging.send_each_for_multicast(message, app=self.firebase_app)
+            return [
+                {
+                    "device_token": token,
+                    "message_id": response.message_id,
+                    "status": "SENT" if response.success else "FAILED",
+                    "error": None if response.success else str(response.exception),
+                    "sent_at": sent_at,
+                    "provider": "firebase"
+                }
+                for token, response in zip(device_tokens, batch.responses)
+            ]
+
+        batch_id = f"PB{stamp}"
+        return [
+            {
+                "device_token": token,
+                "message_id": f"{batch_id}-{i}",
+                "status": "SENT",
+                "sent_at": sent_at,
+                "provider": "firebase"
+            }
+            for i, token in enumerate(device_tokens)
+        ]
@@ -104,7 +104,7 @@ class CacheManager:
                 self.cache_misses += 1
                 self.expirations += 1
                 del self.cache[key]
-                logger.debug(f"Cache '{self.name}': Key '{key}' expired")
+                logger.debug("Cache '{}': Key '{}' expired", self.name, key)
                 return None
 
             # Cache hit!
@@ -116,8 +116,8 @@ class CacheManager:
             self.cache.move_to_end(key)
 
             logger.debug(
-                f"Cache '{self.name}': HIT for key '{key}' "
-                f"(hit #{entry.hits})"
+                "Cache '{}': HIT for key '{}' (hit #{})",
+                self.name, key, entry.hits
             )
 
             return entry.value
@@ -153,15 +153,15 @@ class CacheManager:
                 evicted_key, _ = self.cache.popitem(last=False)
                 self.evictions += 1
                 logger.debug(
-                    f"Cache '{self.name}': Evicted key '{evicted_key}' (LRU)"
+                    "Cache '{}': Evicted key '{}' (LRU)", self.name, evicted_key
                 )
 
             self.cache[key] = entry
             self.cache.move_to_end(key)
 
             logger.debug(
-                f"Cache '{self.name}': SET key '{key}' "
-                f"(ttl={ttl}s, size={len(self.cache)})"
+                "Cache '{}': SET key '{}' (ttl={}s, size={})",
+                self.name, key, ttl, len(self.cache)
             )
 
     def delete(self, key: str) -> bool:
@@ -177,7 +177,7 @@ class CacheManager:
         with self.lock:
             if key in self.cache:
                 del self.cache[key]
-                logger.debug(f"Cache '{self.name}': Deleted key '{key}'")
+                logger.debug("Cache '{}': Deleted key '{}'", self.name, key)
                 return True
             return False
 
@@ -211,7 +211,7 @@ class CacheManager:
             return cached
 
         # Cache miss - fetch value
-        logger.debug(f"Cache '{self.name}': Fetching for key '{key}'")
+        logger.debug("Cache '{}': Fetching for key '{}'", self.name, key)
         value = fetch_func()
 
         # Cache the result
@@ -256,7 +256,7 @@ class CacheManager:
 
             if expired_keys:
                 logger.debug(
-                    f"Cache '{self.name}': Cleaned up {len(expired_keys)} expired entries"
+                    "Cache '{}': Cleaned up {} expired entries", self.name, len(expired_keys)
                 )
 
     def get_stats(self) -> dict:
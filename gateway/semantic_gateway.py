@@ -493,6 +493,21 @@ class SemanticAPIGateway:
             priority=priority
         )
 
+    async def send_sms_bulk(
+        self,
+        phones: List[str],
+        message: str
+    ) -> GatewayResponse:
+        """Send the same SMS notification to many numbers"""
+        return await self.call(
+            operation="send_sms_bulk",
+            adapter_name="notification",
+            adapter_method="send_sms_bulk",
+            use_cache=False,
+            phones=phones,
+            message=message
+        )
+
     async def send_email(
         self,
         email: str,
@@ -512,6 +527,44 @@ class SemanticAPIGateway:
             template=template
         )
 
+    async def send_email_bulk(
+        self,
+        recipients: List[Dict[str, Any]],
+        subject: str,
+        body: str,
+        template: Optional[str] = None
+    ) -> GatewayResponse:
+        """Send the same email notification to many recipients"""
+        return await self.call(
+            operation="send_email_bulk",
+            adapter_name="notification",
+            adapter_method="send_email_bulk",
+            use_cache=False,
+            recipients=recipients,
+            subject=subject,
+            body=body,
+            template=template
+        )
+
+    async def send_push_batch(
+        self,
+        device_tokens: List[str],
+        title: str,
+        body: str,
+        data: Optional[Dict[str, Any]] = None
+    ) -> GatewayResponse:
+        """Send one push notification to many devices"""
+        return await self.call(
+            operation="send_push_batch",
+            adapter_name="notification",
+            adapter_method="send_push_batch",
+            use_cache=False,
+            device_tokens=device_tokens,
+            title=title,
+            body=body,
+            data=data
+        )
+
     # ========================================================================
     # MONITORING & OBSERVABILITY
     # ========================================================================
@@ -35,13 +35,13 @@ setup(
         "neo4j>=5.25.0",
         "supabase>=2.9.0",
         "psycopg2-binary>=2.9.9",
-        "redis>=5.2.0",
+        "redis[hiredis]>=5.2.0",
         "pandas>=2.2.3",
         "numpy>=2.1.3",
         "xmltodict>=0.14.2",
         "lxml>=5.3.0",
         "python-dotenv>=1.0.1",
-        "httpx>=0.27.2",
+        "httpx[http2]>=0.27.2",
         "loguru>=0.7.2",
         "plotly>=5.24.1",
     ],
@@ -53,7 +53,12 @@ setup(
             "black>=24.10.0",
             "ruff>=0.7.3",
             "mypy>=1.13.0",
-        ]
+        ],
+        # Optional fast paths, enabled automatically when installed
+        "fast": [
+            "numba>=0.60.0",
+            "orjson>=3.10.7",
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -0,0 +1,180 @@
+"""
+Unit Tests for Database Utilities
+=================================
+
+Tests the Supabase bulk scan-event load with mocked Postgres and REST
+clients, and the Redis bag status reads behind the process-local cache.
+
+Version: 1.0.0
+Date: 2026-10-17
+"""
+
+import csv
+import io
+import os
+import sys
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+# Settings are required at import time; none of these values are used
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-anthropic-key")
+
+import utils.database as database
+from gateway.cache_manager import CacheConfig, CacheManager
+from utils.database import SCAN_EVENT_COPY_COLUMNS, RedisCache, SupabaseConnection
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+SCAN_EVENTS = [
+    {
+        'event_id': 'EVT-1',
+        'bag_tag': '0016123456789',
+        'scan_type': 'CHECKIN',
+        'location': 'PTY-T1',
+        'timestamp': datetime(2024, 11, 13, 8, 0, tzinfo=timezone.utc),
+        'raw_data': 'ignored',
+    },
+    {
+        'event_id': 'EVT-2',
+        'bag_tag': '0016123456789',
+        'scan_type': 'SORTATION',
+        'location': 'PTY-BHS, Line 2',
+        'timestamp': '2024-11-13T08:20:00Z',
+    },
+]
+
+EXPECTED_ROWS = [
+    ['EVT-1', '0016123456789', 'CHECKIN', 'PTY-T1', '2024-11-13T08:00:00+00:00'],
+    ['EVT-2', '0016123456789', 'SORTATION', 'PTY-BHS, Line 2', '2024-11-13T08:20:00Z'],
+]
+
+
+@pytest.fixture
+def supabase():
+    """SupabaseConnection with a mocked PostgREST client"""
+    connection = SupabaseConnection.__new__(SupabaseConnection)
+    connection.client = MagicMock()
+    return connection
+
+
+@pytest.fixture
+def redis_cache():
+    """RedisCache with a mocked Redis client and an empty local cache"""
+    cache = RedisCache.__new__(RedisCache)
+    cache.client = MagicMock()
+    cache._local_status = CacheManager("bag_status_test", CacheConfig(max_size=100))
+    return cache
+
+
+@pytest.fixture
+def psycopg2(monkeypatch):
+    """Fake psycopg2 whose COPY captures the streamed CSV"""
+    module = MagicMock()
+    conn = module.connect.return_value
+    cursor = conn.cursor.return_value.__enter__.return_value
+    module.copied = {}
+
+    def copy_expert(sql, buffer):
+        module.copied['sql'] = sql
+        module.copied['rows'] = list(csv.reader(io.StringIO(buffer.read())))
+
+    cursor.copy_expert.side_effect = copy_expert
+    monkeypatch.setitem(sys.modules, 'psycopg2', module)
+    return module
+
+
+# ============================================================================
+# BULK SCAN EVENT LOAD
+# ============================================================================
+
+class TestCopyScanEvents:
+    """copy_scan_events uses COPY when it can and REST otherwise"""
+
+    def test_copy_path(self, supabase, psycopg2, monkeypatch):
+        """With a database URL, rows are streamed through COPY"""
+        monkeypatch.setattr(database.settings, 'supabase_db_url', 'postgresql://db.example/postgres')
+
+        loaded = supabase.copy_scan_events(SCAN_EVENTS)
+
+        assert loaded == 2
+        psycopg2.connect.assert_called_once_with('postgresql://db.example/postgres')
+        assert psycopg2.copied['sql'] == (
+            f"COPY scan_events ({', '.join(SCAN_EVENT_COPY_COLUMNS)}) "
+            "FROM STDIN WITH (FORMAT csv)"
+        )
+        assert psycopg2.copied['rows'] == EXPECTED_ROWS
+        psycopg2.connect.return_value.close.assert_called_once()
+        supabase.client.table.assert_not_called()
+
+    def test_connection_closed_when_copy_fails(self, supabase, psycopg2, monkeypatch):
+        """A failed COPY still releases the connection"""
+        monkeypatch.setattr(database.settings, 'supabase_db_url', 'postgresql://db.example/postgres')
+        cursor = psycopg2.connect.return_value.cursor.return_value.__enter__.return_value
+        cursor.copy_expert.side_effect = RuntimeError("COPY failed")
+
+        with pytest.raises(RuntimeError):
+            supabase.copy_scan_events(SCAN_EVENTS)
+
+        psycopg2.connect.return_value.close.assert_called_once()
+
+    def test_rest_fallback(self, supabase, psycopg2, monkeypatch):
+        """Without a database URL, rows go in one multi-row REST insert"""
+        monkeypatch.setattr(database.settings, 'supabase_db_url', None)
+
+        loaded = supabase.copy_scan_events(SCAN_EVENTS)
+
+        assert loaded == 2
+        supabase.client.table.assert_called_once_with('scan_events')
+        supabase.client.table.return_value.insert.assert_called_once_with(
+            [dict(zip(SCAN_EVENT_COPY_COLUMNS, row)) for row in EXPECTED_ROWS]
+        )
+        supabase.client.table.return_value.insert.return_value.execute.assert_called_once()
+        psycopg2.connect.assert_not_called()
+
+    def test_no_events(self, supabase, psycopg2):
+        """An empty batch touches neither backend"""
+        assert supabase.copy_scan_events([]) == 0
+        psycopg2.connect.assert_not_called()
+        supabase.client.table.assert_not_called()
+
+
+# ============================================================================
+# BAG STATUS CACHE
+# ============================================================================
+
+class TestGetBagStatuses:
+    """Multi-bag reads go through the process-local status cache"""
+
+    def test_local_hits_skip_redis(self, redis_cache):
+        """Only bags missing locally are fetched, and they are cached for next time"""
+        redis_cache._local_status.set('BAG1', '{"status": "LOADED"}')
+        redis_cache.client.mget.return_value = ['{"status": "SORTED"}', None]
+
+        statuses = redis_cache.get_bag_statuses(['BAG1', 'BAG2', 'BAG3'])
+
+        assert statuses == {'BAG1': {'status': 'LOADED'}, 'BAG2': {'status': 'SORTED'}}
+        redis_cache.client.mget.assert_called_once_with(['bag:BAG2', 'bag:BAG3'])
+        assert redis_cache.get_bag_status('BAG2') == {'status': 'SORTED'}
+        redis_cache.client.get.assert_not_called()
+
+    def test_all_local_hits(self, redis_cache):
+        """When every bag is cached locally, Redis is not touched"""
+        redis_cache._local_status.set('BAG1', '{"status": "LOADED"}')
+
+        assert redis_cache.get_bag_statuses(['BAG1']) == {'BAG1': {'status': 'LOADED'}}
+        assert redis_cache.get_bag_statuses([]) == {}
+        redis_cache.client.mget.assert_not_called()
+
+    def test_results_are_independent_copies(self, redis_cache):
+        """Mutating a returned status does not change what the cache serves"""
+        redis_cache._local_status.set('BAG1', '{"status": "LOADED"}')
+
+        redis_cache.get_bag_statuses(['BAG1'])['BAG1']['status'] = 'CHANGED'
+
+        assert redis_cache.get_bag_statuses(['BAG1']) == {'BAG1': {'status': 'LOADED'}}
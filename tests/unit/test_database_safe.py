@@ -0,0 +1,142 @@
+"""
+Unit Tests for Lazy Database Connections
+========================================
+
+Tests that the global connections are built once, concurrently and only
+on first access, and that availability checks are cached.
+
+Version: 1.0.0
+Date: 2026-10-17
+"""
+
+import os
+import threading
+import pytest
+from unittest.mock import MagicMock
+
+# Settings are required at import time; none of these values are used
+os.environ.setdefault("JWT_SECRET", "test-jwt-secret")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-anthropic-key")
+
+import utils.database as database
+import utils.database_safe as database_safe
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+@pytest.fixture
+def factories(monkeypatch):
+    """
+    Fake connection factories that only return once all three are running
+
+    A serial build would time out on the barrier, so every connection
+    being built proves the connects overlapped.
+    """
+    barrier = threading.Barrier(3, timeout=5)
+    built = []
+
+    def factory(name):
+        def build():
+            barrier.wait()
+            built.append(name)
+            return MagicMock(name=name)
+        return build
+
+    def failing():
+        barrier.wait()
+        raise ConnectionError("unreachable")
+
+    monkeypatch.setattr(database, "_connections", None)
+    monkeypatch.setattr(database, "_CONNECTION_FACTORIES", {
+        "neo4j_db": (factory("neo4j_db"), "Neo4j connection failed"),
+        "supabase_db": (factory("supabase_db"), "Supabase connection failed"),
+        "redis_cache": (failing, "Redis connection failed"),
+    })
+    return built
+
+
+@pytest.fixture
+def availability(monkeypatch):
+    """Fresh availability cache over mocked connections and a fake clock"""
+    connections = {
+        "neo4j_db": MagicMock(),
+        "supabase_db": MagicMock(),
+        "redis_cache": None,
+    }
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(database_safe, "_initialize_connections", lambda: connections)
+    monkeypatch.setattr(database_safe, "_availability", None)
+    monkeypatch.setattr(database_safe.time, "monotonic", lambda: clock["now"])
+    return connections, clock
+
+
+# ============================================================================
+# LAZY CONNECTIONS
+# ============================================================================
+
+class TestGetConnections:
+    """Global connections are built concurrently, once, on first access"""
+
+    def test_built_concurrently_on_first_access(self, factories):
+        """Nothing connects until an attribute is read, then all three at once"""
+        assert database._connections is None
+
+        neo4j_db = database.neo4j_db
+
+        assert sorted(factories) == ["neo4j_db", "supabase_db"]
+        assert neo4j_db is database.get_connections()["neo4j_db"]
+        assert database.redis_cache is None
+
+    def test_built_once(self, factories):
+        """Later accesses reuse the same instances"""
+        first = database.get_connections()
+
+        assert database.get_connections() is first
+        assert database_safe.supabase_db is first["supabase_db"]
+        assert len(factories) == 2
+
+    def test_unknown_attribute(self):
+        with pytest.raises(AttributeError):
+            database.not_a_connection
+
+
+# ============================================================================
+# AVAILABILITY CACHE
+# ============================================================================
+
+class TestIsDatabaseAvailable:
+    """Connectivity probes run at most once per cache period"""
+
+    def test_probes_each_backend(self, availability):
+        connections, _ = availability
+        connections["supabase_db"].client.table.side_effect = ConnectionError("down")
+
+        assert database_safe.is_database_available() == {
+            "neo4j": True,
+            "supabase": False,
+            "redis": False,
+        }
+        connections["neo4j_db"].driver.verify_connectivity.assert_called_once()
+
+    def test_cached_for_sixty_seconds(self, availability):
+        connections, clock = availability
+        verify = connections["neo4j_db"].driver.verify_connectivity
+
+        database_safe.is_database_available()
+        clock["now"] += database_safe.AVAILABILITY_CACHE_SECONDS - 1
+        cached = database_safe.is_database_available()
+        assert verify.call_count == 1
+
+        verify.side_effect = ConnectionError("down")
+        clock["now"] += 1
+        assert cached["neo4j"] is True
+        assert database_safe.is_database_available()["neo4j"] is False
+        assert verify.call_count == 2
+
+    def test_returns_copies(self, availability):
+        database_safe.is_database_available()["neo4j"] = "mutated"
+
+        assert database_safe.is_database_available()["neo4j"] is True
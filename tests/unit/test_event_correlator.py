@@ -0,0 +1,362 @@
+"""
+Unit Tests for the Event Correlation Engine
+===========================================
+
+Checks the incrementally maintained correlator state against a full
+recount of the events it currently holds, and the indexed pattern cache
+against a plain list scanned linearly.
+
+Version: 1.0.0
+Date: 2026-10-17
+"""
+
+import random
+import pytest
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+
+from utils.event_correlator import (
+    CorrelatedEventGroup,
+    EventCorrelationEngine,
+    _PatternAggregate
+)
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+LOCATIONS = ['PTY-SORT-1', 'PTY-SORT-2', 'MIA-T3', 'BKK-SORT-4']
+FLIGHTS = ['CM101', 'CM202', 'AA123', '']
+EXCEPTION_TYPES = ['misroute', 'damaged', 'misroute_transfer', None]
+
+
+def _event_stream(seed: int, count: int) -> List[Tuple[Dict[str, Any], str]]:
+    """
+    Scan events spanning several correlation windows
+
+    Includes misroute bursts, time-gap anomalies, null exception types and
+    adjacent out-of-order arrivals.
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 11, 13, 8, 0, tzinfo=timezone.utc)
+    stream = []
+    for i in range(count):
+        event = {
+            'scan_type': rng.choice(['SORTATION', 'LOADING', 'EXCEPTION', 'EXCEPTION', 'CHECKIN']),
+            'location': rng.choice(LOCATIONS),
+            'flight_number': rng.choice(FLIGHTS),
+            'timestamp': (start + timedelta(seconds=i * 4)).isoformat()
+        }
+        if event['scan_type'] == 'EXCEPTION':
+            event['exception_type'] = rng.choice(EXCEPTION_TYPES)
+        if (i // 100) % 5 == 0 and rng.random() < 0.8:
+            event.update(scan_type='EXCEPTION', exception_type='misroute', location='PTY-SORT-1')
+        if rng.random() < 0.4:
+            event['validation_result'] = {'anomalies': ['time_gap'] if rng.random() < 0.7 else []}
+        stream.append((event, f'BAG{rng.randint(0, 400):04d}'))
+
+    for i in range(len(stream) - 1):
+        if rng.random() < 0.3:
+            stream[i], stream[i + 1] = stream[i + 1], stream[i]
+    return stream
+
+
+@pytest.fixture
+def engine():
+    return EventCorrelationEngine(pattern_confidence_threshold=0.3)
+
+
+@pytest.fixture
+def stream():
+    return _event_stream(seed=7, count=2500)
+
+
+def _groupings(aggregate: _PatternAggregate) -> Dict[str, Any]:
+    """Comparable view of an aggregate; events are matched by identity"""
+    def members(groups):
+        return {key: sorted(id(event) for event in events) for key, events in groups.items()}
+
+    return {
+        'event_count': aggregate.event_count,
+        'misroute_count': aggregate.misroute_count,
+        'delay_count': aggregate.delay_count,
+        'exception_count': aggregate.exception_count,
+        'misroutes_by_location': members(aggregate.misroutes_by_location),
+        'delays_by_location': members(aggregate.delays_by_location),
+        'exceptions_by_type': members(aggregate.exceptions_by_type),
+        'exception_locations': {
+            key: dict(locations) for key, locations in aggregate.exception_locations.items()
+        },
+    }
+
+
+def _recount(events) -> _PatternAggregate:
+    aggregate = _PatternAggregate()
+    for event in events:
+        aggregate.add(event)
+    return aggregate
+
+
+# ============================================================================
+# PATTERN GROUPINGS
+# ============================================================================
+
+class TestPatternAggregates:
+    """Per-bucket groupings must equal a recount of the bucket's events"""
+
+    def test_match_recount_as_windows_slide(self, engine, stream):
+        """After every event, including evictions, each bucket matches a recount"""
+        for event, bag_tag in stream:
+            engine.correlate_event(event, bag_tag)
+
+            for key, aggregate in engine._bucket_aggregates.items():
+                events = engine.time_buckets.get(key, ())
+                assert _groupings(aggregate) == _groupings(_recount(events)), key
+
+    def test_evictions_happened(self, engine, stream):
+        """The stream is long enough for buckets to be evicted and swept"""
+        for event, bag_tag in stream:
+            engine.correlate_event(event, bag_tag)
+
+        buckets_seen = {
+            engine._get_time_bucket(datetime.fromisoformat(event['timestamp']))
+            for event, _ in stream
+        }
+        retained = sum(len(events) for events in engine.time_buckets.values())
+        assert retained < len(stream)
+        assert set(engine._bucket_aggregates) == set(engine.time_buckets)
+        assert len(engine.time_buckets) < len(buckets_seen)
+
+    def test_remove_undoes_add(self):
+        """Removing every event leaves no groups behind"""
+        events = [
+            {'scan_type': 'EXCEPTION', 'exception_type': 'misroute', 'location': 'PTY'},
+            {'scan_type': 'EXCEPTION', 'exception_type': None, 'location': 'MIA'},
+            {'scan_type': 'EXCEPTION', 'location': 'MIA'},
+            {'scan_type': 'SORTATION', 'anomaly_set': frozenset({'time_gap'})},
+        ]
+        aggregate = _recount(events)
+
+        for event in events:
+            aggregate.remove(event)
+
+        assert _groupings(aggregate) == _groupings(_PatternAggregate())
+
+
+# ============================================================================
+# PATTERN CACHE
+# ============================================================================
+
+PRIORITY_LEVELS = {"LOW": 0, "MEDIUM": 1, "HIGH": 2, "CRITICAL": 3}
+
+
+class ReferencePatternCache:
+    """The pattern cache as a plain list, deduplicated and searched linearly"""
+
+    def __init__(self, correlation_window: timedelta):
+        self.correlation_window = correlation_window
+        self.patterns: List[Dict[str, Any]] = []
+
+    def record(self, patterns: List[CorrelatedEventGroup]):
+        for pattern in patterns:
+            entry = {
+                'group_id': pattern.group_id,
+                'detected_at': pattern.detected_at,
+                'pattern_type': pattern.pattern_type,
+                'priority': pattern.priority,
+                'correlation_type': pattern.correlation_type,
+                'bag_tags': set(pattern.bag_tags),
+            }
+            for i, cached in enumerate(self.patterns):
+                if cached['group_id'] == pattern.group_id:
+                    # A re-detection keeps its place and first detection time
+                    entry['detected_at'] = cached['detected_at']
+                    self.patterns[i] = entry
+                    break
+            else:
+                self.patterns.append(entry)
+
+    def cleanup(self, now: datetime):
+        cutoff = now - self.correlation_window * 3
+        self.patterns = [p for p in self.patterns if p['detected_at'] >= cutoff]
+
+    def active(self, now: datetime, pattern_type=None, min_priority="MEDIUM") -> List[str]:
+        min_level = PRIORITY_LEVELS.get(min_priority, 1)
+        return [
+            p['group_id'] for p in self.patterns
+            if now - p['detected_at'] <= self.correlation_window * 2
+            and (not pattern_type or p['pattern_type'] == pattern_type)
+            and PRIORITY_LEVELS.get(p['priority'], 0) >= min_level
+        ]
+
+    def correlated_bags(self, bag_tag: str, correlation_types=None) -> set:
+        bags = set()
+        for p in self.patterns:
+            if bag_tag in p['bag_tags'] and (
+                correlation_types is None or p['correlation_type'] in correlation_types
+            ):
+                bags |= p['bag_tags']
+        bags.discard(bag_tag)
+        return bags
+
+
+def _pattern(group_id: str, detected_at: datetime, bag_tags, pattern_type="bulk_misroute",
+             priority="HIGH") -> CorrelatedEventGroup:
+    return CorrelatedEventGroup(
+        group_id=group_id,
+        correlation_type="pattern",
+        pattern_type=pattern_type,
+        priority=priority,
+        bag_tags=set(bag_tags),
+        detected_at=detected_at
+    )
+
+
+def _assert_cache_matches(engine: EventCorrelationEngine, reference: ReferencePatternCache):
+    assert [p.group_id for p in engine.detected_patterns] == \
+        [p['group_id'] for p in reference.patterns]
+    assert [p.detected_at for p in engine.detected_patterns] == \
+        [p['detected_at'] for p in reference.patterns]
+
+    now = datetime.now()
+    for pattern_type in (None, "bulk_misroute", "systematic_delay", "mass_exception"):
+        for min_priority in PRIORITY_LEVELS:
+            active = engine.get_active_patterns(pattern_type, min_priority)
+            assert [p.group_id for p in active] == \
+                reference.active(now, pattern_type, min_priority), (pattern_type, min_priority)
+
+    bag_tags = set().union(*(p['bag_tags'] for p in reference.patterns)) | {'BAG-UNKNOWN'}
+    for bag_tag in bag_tags:
+        for correlation_types in (None, ["pattern"], ["same_flight"]):
+            assert set(engine.get_correlated_bags(bag_tag, correlation_types)) == \
+                reference.correlated_bags(bag_tag, correlation_types), bag_tag
+
+
+class TestPatternCache:
+    """Bloom-filtered, bisected pattern cache must behave like a plain list"""
+
+    def test_live_stream_matches_reference(self, engine, stream):
+        """Re-detections are deduplicated by group_id as patterns stream in"""
+        reference = ReferencePatternCache(engine.correlation_window)
+        detections = 0
+        for event, bag_tag in stream:
+            patterns = [
+                group for group in engine.correlate_event(event, bag_tag)
+                if group.correlation_type == "pattern"
+            ]
+            detections += len(patterns)
+            reference.record(patterns)
+
+        # Rescans re-detected the same groups, which must not pile up
+        assert len(reference.patterns) < detections
+        _assert_cache_matches(engine, reference)
+
+    def test_trim_and_redetect(self, engine):
+        """Expired patterns are trimmed and later re-detections land in the right slot"""
+        reference = ReferencePatternCache(engine.correlation_window)
+        now = datetime.now()
+        old_a = _pattern("A", now - timedelta(minutes=100), {"BAG1", "BAG2"})
+        old_b = _pattern("B", now - timedelta(minutes=95), {"BAG2", "BAG3"}, "mass_exception", "CRITICAL")
+        recent_c = _pattern("C", now - timedelta(minutes=50), {"BAG4", "BAG5"}, "systematic_delay")
+        fresh_d = _pattern("D", now - timedelta(minutes=10), {"BAG5", "BAG6"}, priority="LOW")
+
+        for patterns in (
+            [old_a, old_b, recent_c, fresh_d],
+            [_pattern("A", now, {"BAG1", "BAG7"})],
+        ):
+            reference.record(patterns)
+            engine._record_patterns(patterns)
+        _assert_cache_matches(engine, reference)
+
+        # A and B are older than 3 windows (90 minutes)
+        engine._cleanup_old_events(now)
+        reference.cleanup(now)
+        assert [p.group_id for p in engine.detected_patterns] == ["C", "D"]
+        _assert_cache_matches(engine, reference)
+
+        # C is replaced in place; A was trimmed, so it is cached anew
+        for patterns in (
+            [_pattern("C", now, {"BAG4", "BAG8"}, "systematic_delay")],
+            [_pattern("A", now, {"BAG1", "BAG9"})],
+        ):
+            reference.record(patterns)
+            engine._record_patterns(patterns)
+        assert [p.group_id for p in engine.detected_patterns] == ["C", "D", "A"]
+        _assert_cache_matches(engine, reference)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        """Every cached bag tag passes its pattern's Bloom filter"""
+        engine = EventCorrelationEngine()
+        tags = [f"BAG{i:05d}" for i in range(500)]
+        pattern = _pattern("P", datetime.now(), tags)
+        engine._record_patterns([pattern])
+
+        for tag in tags:
+            others = engine.get_correlated_bags(tag)
+            assert len(others) == len(tags) - 1
+
+    def test_pattern_cached_directly_is_found(self):
+        """A pattern appended without _record_patterns still matches its bags"""
+        engine = EventCorrelationEngine()
+        engine.detected_patterns.append(_pattern("P", datetime.now(), {"BAG1", "BAG2"}))
+
+        assert engine.get_correlated_bags("BAG1") == ["BAG2"]
+        assert engine.get_correlated_bags("BAG3") == []
+
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+class TestReplay:
+    """replay must report what the live path finishes each bucket on"""
+
+    def test_matches_live_detection(self, stream):
+        """Each replayed pattern equals the live path's last detection of its group id"""
+        engine = EventCorrelationEngine(pattern_confidence_threshold=0.3, pattern_rescan_interval=1)
+        live = {}
+        for event, bag_tag in stream:
+            for group in engine.correlate_event(event, bag_tag):
+                if group.correlation_type == "pattern":
+                    live[group.group_id] = group
+
+        replayed = EventCorrelationEngine(pattern_confidence_threshold=0.3).replay(
+            dict(event, bag_tag=bag_tag) for event, bag_tag in stream
+        )
+
+        assert replayed
+        for pattern in replayed:
+            assert pattern.group_id in live, pattern.group_id
+            assert pattern.bag_tags == live[pattern.group_id].bag_tags
+            assert pattern.confidence == pytest.approx(live[pattern.group_id].confidence)
+
+    def test_late_event_labels_bucket(self):
+        """A bucket finished by a late event is labelled by that event, as live"""
+        start = datetime(2024, 11, 13, 8, 0, tzinfo=timezone.utc)
+        minutes = [0, 2, 3, 4, 5, 1]
+        events = [
+            {
+                'bag_tag': f'BAG{i}',
+                'scan_type': 'EXCEPTION',
+                'exception_type': 'misroute',
+                'location': 'PTY-SORT-1',
+                'timestamp': (start + timedelta(minutes=minute)).isoformat()
+            }
+            for i, minute in enumerate(minutes)
+        ]
+        engine = EventCorrelationEngine(pattern_rescan_interval=1)
+        live = [
+            group.group_id
+            for event in events
+            for group in engine.correlate_event(event, event['bag_tag'])
+            if group.correlation_type == "pattern"
+        ]
+
+        replayed = EventCorrelationEngine().replay(events)
+
+        assert [pattern.group_id for pattern in replayed] == [
+            "bulk_misroute_PTY-SORT-1_20241113_0801",
+            "mass_exception_misroute_20241113_0801"
+        ]
+        assert live[-2:] == [pattern.group_id for pattern in replayed]
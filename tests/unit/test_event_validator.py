@@ -0,0 +1,213 @@
+"""
+Unit Tests for the Event Sequence Validator
+===========================================
+
+Checks that the batch and incremental validation paths agree with
+validate_sequence.
+
+Version: 1.0.0
+Date: 2026-10-17
+"""
+
+import random
+import pytest
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import utils.event_validator as event_validator
+from models.event_ontology import ScanAnomaly, ScanEventType
+from utils.event_validator import EventSequenceValidator
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+# A plausible journey, so most generated bags have long valid stretches
+CANONICAL_JOURNEY = [
+    'CHECKIN', 'SECURITY', 'SORTATION', 'LOADING', 'ARRIVAL',
+    'TRANSFER', 'LOADING', 'ARRIVAL', 'CUSTOMS', 'CLAIM'
+]
+
+# Every scan type, plus aliases, unknown values and missing ones
+SCAN_TYPES = [event_type.value for event_type in ScanEventType] + [
+    'checkin', 'sort', 'LOAD', 'Claim', 'TRANSFER_SCAN', 'BOGUS', '', None
+]
+
+# Gaps from well under a minimum gap to far over a maximum one
+GAPS_SECONDS = [30, 90, 200, 400, 1200, 2400, 4000, 40000]
+
+
+def _timestamp(ts: datetime, fmt: str) -> str:
+    if fmt == 'z':
+        return ts.strftime('%Y-%m-%dT%H:%M:%SZ')
+    if fmt == 'millis':
+        return ts.strftime('%Y-%m-%dT%H:%M:%S.') + f"{ts.microsecond // 1000:03d}Z"
+    if fmt == 'offset':
+        return ts.isoformat()
+    return ts.replace(tzinfo=None).isoformat()
+
+
+def _random_bags(seed: int, count: int) -> Dict[str, List[Dict[str, Any]]]:
+    """Random scan histories covering every scan type and anomaly"""
+    rng = random.Random(seed)
+    bags = {}
+    for b in range(count):
+        fmt = rng.choice(['z', 'millis', 'offset', 'naive'])
+        ts = datetime(2024, 11, 13, 8, 0, tzinfo=timezone.utc) + timedelta(minutes=rng.randint(0, 600))
+        events = []
+        for i in range(rng.randint(0, 25)):
+            if rng.random() < 0.6:
+                scan_type = CANONICAL_JOURNEY[i % len(CANONICAL_JOURNEY)]
+            else:
+                scan_type = rng.choice(SCAN_TYPES)
+            ts += timedelta(seconds=rng.choice(GAPS_SECONDS))
+            event = {
+                'scan_type': scan_type,
+                'location': rng.choice(['PTY', 'MIA', '']),
+                'timestamp': _timestamp(ts, fmt)
+            }
+            if rng.random() < 0.03:
+                del event['timestamp']
+            elif rng.random() < 0.03:
+                event['timestamp'] = 'garbage'
+            events.append(event)
+            if rng.random() < 0.1:
+                events.append(dict(event))
+        if rng.random() < 0.2:
+            rng.shuffle(events)
+        bags[f'BAG{b:04d}'] = events
+    return bags
+
+
+@pytest.fixture
+def validator():
+    return EventSequenceValidator()
+
+
+@pytest.fixture
+def bags():
+    return _random_bags(seed=11, count=400)
+
+
+# ============================================================================
+# BATCH VALIDATION
+# ============================================================================
+
+class TestValidateMany:
+    """validate_many must return exactly what validate_sequence does"""
+
+    @pytest.mark.parametrize("use_kernel", [True, False])
+    def test_matches_validate_sequence(self, validator, bags, monkeypatch, use_kernel):
+        """Batch results match per-bag results, with and without the scan kernel"""
+        # Without numba installed, _scan_kernel runs as plain Python
+        monkeypatch.setattr(event_validator, "NUMBA_AVAILABLE", use_kernel)
+
+        batch = validator.validate_many(bags)
+
+        assert list(batch) == list(bags)
+        for bag_tag, events in bags.items():
+            assert batch[bag_tag] == validator.validate_sequence(events, bag_tag), bag_tag
+
+    def test_fixture_covers_all_scan_types_and_anomalies(self, validator, bags):
+        """The parity data exercises every scan type and every anomaly raised"""
+        seen_types = set()
+        anomalies = set()
+        missing_scans = set()
+        for bag_tag, events in bags.items():
+            seen_types.update(
+                validator._parse_event_type(event['scan_type']) for event in events
+            )
+            result = validator.validate_sequence(events, bag_tag)
+            anomalies.update(result.anomalies)
+            missing_scans.update(result.missing_scans)
+
+        assert set(ScanEventType) <= seen_types
+        assert {
+            ScanAnomaly.OUT_OF_SEQUENCE,
+            ScanAnomaly.TIME_GAP,
+            ScanAnomaly.DUPLICATE_SCAN
+        } <= anomalies
+        assert missing_scans
+
+    def test_empty_and_single_event_bags(self, validator, monkeypatch):
+        """Edge cases take the same path as validate_sequence"""
+        monkeypatch.setattr(event_validator, "NUMBA_AVAILABLE", True)
+        bags = {
+            'EMPTY': [],
+            'SINGLE': [{'scan_type': 'CHECKIN', 'location': 'PTY', 'timestamp': '2024-11-13T08:00:00Z'}],
+            'BAD_FIRST': [{'scan_type': 'CLAIM', 'location': 'MIA', 'timestamp': '2024-11-13T08:00:00Z'}],
+        }
+
+        batch = validator.validate_many(bags)
+
+        for bag_tag, events in bags.items():
+            assert batch[bag_tag] == validator.validate_sequence(events, bag_tag)
+
+
+# ============================================================================
+# INCREMENTAL VALIDATION
+# ============================================================================
+
+class TestIncrementallyValidate:
+    """incrementally_validate must track validate_sequence scan by scan"""
+
+    def test_matches_validate_sequence(self, validator, bags):
+        """After every scan, the running result equals a full revalidation"""
+        for bag_tag, events in bags.items():
+            fed = []
+            for event in event_validator._chronological(events):
+                fed.append(event)
+                result = validator.incrementally_validate(bag_tag, event)
+                assert result == validator.validate_sequence(fed, bag_tag), (bag_tag, len(fed))
+
+    def test_reset_one_bag(self, validator):
+        """Resetting a bag drops only that bag's summary"""
+        claim = {'scan_type': 'CLAIM', 'location': 'MIA', 'timestamp': '2024-11-13T08:00:00Z'}
+        checkin = {'scan_type': 'CHECKIN', 'location': 'PTY', 'timestamp': '2024-11-13T08:30:00Z'}
+        validator.incrementally_validate('BAG1', claim)
+        validator.incrementally_validate('BAG2', claim)
+
+        validator.reset_incremental_state('BAG1')
+
+        # BAG1 starts over from the CHECKIN; BAG2 still remembers its CLAIM
+        reset_result = validator.incrementally_validate('BAG1', checkin)
+        kept_result = validator.incrementally_validate('BAG2', checkin)
+
+        assert reset_result == validator.validate_sequence([checkin], 'BAG1')
+        assert kept_result == validator.validate_sequence([claim, checkin], 'BAG2')
+        assert reset_result.anomalies != kept_result.anomalies
+
+    def test_rebuilds_dropped_state_from_history(self, validator, bags):
+        """A bag whose summary was dropped is rebuilt from the history passed in"""
+        for bag_tag, events in bags.items():
+            events = event_validator._chronological(events)
+            if len(events) < 2:
+                continue
+            for event in events[:-1]:
+                validator.incrementally_validate(bag_tag, event)
+
+            validator.reset_incremental_state(bag_tag)
+            result = validator.incrementally_validate(bag_tag, events[-1], history=events[:-1])
+
+            assert result == validator.validate_sequence(events, bag_tag), bag_tag
+
+    def test_history_ignored_with_cached_state(self, validator):
+        """While a summary is cached, history is not replayed again"""
+        checkin = {'scan_type': 'CHECKIN', 'location': 'PTY', 'timestamp': '2024-11-13T08:00:00Z'}
+        security = {'scan_type': 'SECURITY', 'location': 'PTY', 'timestamp': '2024-11-13T08:20:00Z'}
+        validator.incrementally_validate('BAG1', checkin)
+
+        result = validator.incrementally_validate('BAG1', security, history=[checkin])
+
+        assert result == validator.validate_sequence([checkin, security], 'BAG1')
+
+    def test_reset_all_bags(self, validator, bags):
+        """Resetting without a bag tag clears every summary"""
+        for bag_tag, events in bags.items():
+            for event in event_validator._chronological(events):
+                validator.incrementally_validate(bag_tag, event)
+
+        validator.reset_incremental_state()
+
+        assert validator._bag_state.get_stats()["size"] == 0
@@ -0,0 +1,286 @@
+"""
+Unit Tests for the Notification Adapter
+=======================================
+
+Tests the bulk senders, with provider requests answered by a mocked
+HTTP transport.
+
+Version: 1.0.0
+Date: 2026-10-17
+"""
+
+import base64
+import json
+import httpx
+import pytest
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+import gateway.adapters.notification_adapter as notification_adapter
+
+from gateway.adapters.base_adapter import AdapterConfig
+from gateway.adapters.notification_adapter import (
+    SENDGRID_MAIL_SEND_URL,
+    TWILIO_NOTIFY_BASE_URL,
+    NotificationAdapter
+)
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+PHONES = ["+15551230001", "+15551230002", "not-a-number", "+15551230001", 15551230003, None]
+
+
+def _config() -> AdapterConfig:
+    return AdapterConfig(
+        base_url="https://api.twilio.com",
+        auth_type="basic",
+        username="AC123",
+        password="token"
+    )
+
+
+@pytest.fixture
+def sent_requests():
+    """Requests seen by the mocked transport"""
+    return []
+
+
+@pytest.fixture
+def notify_adapter(sent_requests):
+    """Adapter with a Notify service whose requests are answered locally"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent_requests.append(request)
+        return httpx.Response(201, json={"sid": "NT123"})
+
+    adapter = NotificationAdapter(_config(), notify_service_sid="IS123")
+    adapter.http_client.close()
+    adapter.http_client = httpx.Client(transport=httpx.MockTransport(handler))
+    yield adapter
+    adapter.close()
+
+
+@pytest.fixture
+def sendgrid_adapter(sent_requests):
+    """Adapter with a SendGrid key whose requests are answered locally"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent_requests.append(request)
+        return httpx.Response(202, headers={"X-Message-Id": f"SG{len(sent_requests)}"})
+
+    adapter = NotificationAdapter(
+        _config(), sendgrid_api_key="SG.key", sendgrid_from_email="ops@example.com"
+    )
+    adapter.http_client.close()
+    adapter.http_client = httpx.Client(transport=httpx.MockTransport(handler))
+    yield adapter
+    adapter.close()
+
+
+@pytest.fixture
+def adapter():
+    """Adapter without a Notify service"""
+    adapter = NotificationAdapter(_config())
+    yield adapter
+    adapter.close()
+
+
+# ============================================================================
+# BULK SMS
+# ============================================================================
+
+EXPECTED_STATUSES = {
+    "+15551230001": "SENT",
+    "+15551230002": "SENT",
+    "not-a-number": "INVALID",
+    "15551230003": "INVALID",
+    "None": "INVALID",
+}
+
+
+class TestSendSmsBulk:
+    """send_sms_bulk returns the same shape with and without Notify"""
+
+    def test_notify_request(self, notify_adapter, sent_requests):
+        """One Notify request carries every distinct valid number"""
+        result = notify_adapter.send_sms_bulk(PHONES, "Your bag is delayed")
+
+        assert len(sent_requests) == 1
+        request = sent_requests[0]
+        assert str(request.url) == f"{TWILIO_NOTIFY_BASE_URL}/Services/IS123/Notifications"
+        assert request.headers["authorization"] == "Basic " + base64.b64encode(b"AC123:token").decode()
+        form = parse_qs(request.content.decode())
+        assert form["Body"] == ["Your bag is delayed"]
+        assert [json.loads(binding)["address"] for binding in form["ToBinding"]] == \
+            ["+15551230001", "+15551230002"]
+
+        assert result["notification_id"] == "NT123"
+        assert result["recipients"] == 2
+        assert result["statuses"] == EXPECTED_STATUSES
+        assert list(result["statuses"]) == list(EXPECTED_STATUSES)
+
+    def test_notify_error_raises(self):
+        """A rejected Notify request fails the call and is counted"""
+        adapter = NotificationAdapter(_config(), notify_service_sid="IS123")
+        adapter.http_client.close()
+        adapter.http_client = httpx.Client(
+            transport=httpx.MockTransport(lambda request: httpx.Response(400, json={}))
+        )
+
+        with pytest.raises(httpx.HTTPStatusError):
+            adapter.send_sms_bulk(["+15551230001"], "Hello")
+
+        assert adapter.stats.failed_calls == 1
+        adapter.close()
+
+    def test_fallback_matches_notify_shape(self, adapter, notify_adapter):
+        """Without Notify each number is sent once, with the same result keys"""
+        result = adapter.send_sms_bulk(PHONES, "Your bag is delayed")
+        notify_result = notify_adapter.send_sms_bulk(PHONES, "Your bag is delayed")
+
+        assert set(result) == set(notify_result)
+        assert result["notification_id"] is None
+        assert result["recipients"] == 2
+        assert result["statuses"] == EXPECTED_STATUSES
+        assert adapter.stats.successful_calls == 2
+
+    def test_no_valid_numbers(self, notify_adapter, sent_requests):
+        """Nothing is sent when every number is malformed"""
+        result = notify_adapter.send_sms_bulk(["bad", ["+15551230001"]], "Hello")
+
+        assert sent_requests == []
+        assert result["recipients"] == 0
+        assert result["statuses"] == {"bad": "INVALID", "['+15551230001']": "INVALID"}
+
+
+# ============================================================================
+# BULK EMAIL
+# ============================================================================
+
+RECIPIENTS = [
+    {"email": "ana@example.com", "name": "Ana", "vars": {"flight": "CM101"}},
+    {"email": "ben@example.com"},
+    {"email": "not-an-address"},
+    {"name": "No Email"},
+]
+
+
+class TestSendEmailBulk:
+    """send_email_bulk sends one request per SENDGRID_MAX_PERSONALIZATIONS recipients"""
+
+    def test_one_request_for_all_recipients(self, sendgrid_adapter, sent_requests):
+        """Every valid recipient is a personalization of a single request"""
+        result = sendgrid_adapter.send_email_bulk(RECIPIENTS, "Bag update", "<p>Hi</p>", "d-123")
+
+        assert len(sent_requests) == 1
+        request = sent_requests[0]
+        assert str(request.url) == SENDGRID_MAIL_SEND_URL
+        assert request.headers["authorization"] == "Bearer SG.key"
+        assert json.loads(request.content) == {
+            "personalizations": [
+                {
+                    "to": [{"email": "ana@example.com", "name": "Ana"}],
+                    "dynamic_template_data": {"passenger_name": "Ana", "flight": "CM101"}
+                },
+                {"to": [{"email": "ben@example.com"}], "dynamic_template_data": {}},
+            ],
+            "from": {"email": "ops@example.com"},
+            "subject": "Bag update",
+            "content": [{"type": "text/html", "value": "<p>Hi</p>"}],
+            "template_id": "d-123"
+        }
+        assert result["recipients"] == 2
+        assert result["invalid"] == 2
+        assert result["requests"] == 1
+        assert result["results"][0]["message_id"] == "SG1"
+
+    def test_large_lists_are_split(self, sendgrid_adapter, sent_requests, monkeypatch):
+        monkeypatch.setattr(
+            "gateway.adapters.notification_adapter.SENDGRID_MAX_PERSONALIZATIONS", 1
+        )
+
+        result = sendgrid_adapter.send_email_bulk(RECIPIENTS, "Bag update", "<p>Hi</p>")
+
+        assert [len(json.loads(r.content)["personalizations"]) for r in sent_requests] == [1, 1]
+        assert [r["message_id"] for r in result["results"]] == ["SG1", "SG2"]
+
+    def test_without_api_key_nothing_is_sent(self, adapter):
+        """Without a SendGrid key the batch is only reported, like send_email"""
+        result = adapter.send_email_bulk(RECIPIENTS, "Bag update", "<p>Hi</p>")
+
+        assert result["recipients"] == 2
+        assert result["requests"] == 1
+        assert result["results"][0]["status"] == "SENT"
+
+
+# ============================================================================
+# BATCH PUSH
+# ============================================================================
+
+class FakeMessaging:
+    """Stands in for firebase_admin.messaging, recording multicast messages"""
+
+    def __init__(self):
+        self.messages = []
+
+    @staticmethod
+    def Notification(**kwargs):
+        return kwargs
+
+    @staticmethod
+    def MulticastMessage(**kwargs):
+        return kwargs
+
+    def send_each_for_multicast(self, message, app=None):
+        self.messages.append((message, app))
+        return SimpleNamespace(responses=[
+            SimpleNamespace(
+                success=not token.startswith("bad"),
+                message_id=f"projects/p/messages/{i}",
+                exception=None if not token.startswith("bad") else ValueError("unregistered")
+            )
+            for i, token in enumerate(message["tokens"])
+        ])
+
+
+class TestSendPushBatch:
+    """send_push_batch sends FCM multicasts carrying the data payload"""
+
+    def test_data_is_forwarded(self, monkeypatch):
+        messaging = FakeMessaging()
+        monkeypatch.setattr(notification_adapter, "messaging", messaging, raising=False)
+        monkeypatch.setattr(notification_adapter, "FIREBASE_AVAILABLE", True)
+        app = object()
+        adapter = NotificationAdapter(_config(), firebase_app=app)
+
+        result = adapter.send_push_batch(
+            ["tok1", "bad2"], "Bag found", "Your bag is at PTY",
+            data={"bag_tag": "0016123456789", "attempt": 2}
+        )
+
+        assert messaging.messages == [({
+            "tokens": ["tok1", "bad2"],
+            "notification": {"title": "Bag found", "body": "Your bag is at PTY"},
+            "data": {"bag_tag": "0016123456789", "attempt": "2"}
+        }, app)]
+        assert result["success_count"] == 1
+        assert result["failure_count"] == 1
+        assert [r["status"] for r in result["responses"]] == ["SENT", "FAILED"]
+        assert result["responses"][1]["error"] == "unregistered"
+        adapter.close()
+
+    def test_chunks_keep_token_order(self, monkeypatch):
+        messaging = FakeMessaging()
+        monkeypatch.setattr(notification_adapter, "messaging", messaging, raising=False)
+        monkeypatch.setattr(notification_adapter, "FIREBASE_AVAILABLE", True)
+        monkeypatch.setattr(notification_adapter, "FCM_MULTICAST_MAX_TOKENS", 2)
+        adapter = NotificationAdapter(_config(), firebase_app=object())
+        tokens = [f"tok{i}" for i in range(5)]
+
+        result = adapter.send_push_batch(tokens, "Bag found", "Your bag is at PTY")
+
+        assert sorted(len(message["tokens"]) for message, _ in messaging.messages) == [1, 2, 2]
+        assert all(message["data"] == {} for message, _ in messaging.messages)
+        assert [r["device_token"] for r in result["responses"]] == tokens
+        adapter.close()
@@ -1,14 +1,141 @@
 """
 Database connection utilities
 """
-from neo4j import GraphDatabase, AsyncGraphDatabase
+from neo4j import GraphDatabase, AsyncGraphDatabase, RoutingControl
 from supabase import create_client, Client
 from redis import Redis
 import asyncio
-from typing import Optional, Dict, Any, List
+import atexit
+import csv
+import io
+import json
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Iterable
 from loguru import logger
 
 from config.settings import settings
+from gateway.cache_manager import CacheManager, CacheConfig
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Cypher statements are kept as constants so every call sends the identical
+# query text and hits the server-side query plan cache
+CREATE_DIGITAL_TWIN_CYPHER = """
+CREATE (b:Baggage {
+    bag_tag: $bag_tag,
+    status: $status,
+    current_location: $current_location,
+    passenger_name: $passenger_name,
+    pnr: $pnr,
+    routing: $routing,
+    risk_score: $risk_score,
+    created_at: datetime($created_at),
+    updated_at: datetime()
+})
+"""
+
+UPDATE_BAG_LOCATION_CYPHER = """
+MATCH (b:Baggage {bag_tag: $bag_tag})
+SET b.current_location = $location,
+    b.status = $status,
+    b.updated_at = datetime()
+"""
+
+ADD_SCAN_EVENT_CYPHER = """
+MATCH (b:Baggage {bag_tag: $bag_tag})
+CREATE (s:ScanEvent {
+    event_id: $event_id,
+    scan_type: $scan_type,
+    location: $location,
+    timestamp: datetime($timestamp)
+})
+CREATE (b)-[:SCANNED_AT]->(s)
+"""
+
+RECORD_SCAN_CYPHER = """
+MATCH (b:Baggage {bag_tag: $bag_tag})
+SET b.current_location = $location,
+    b.status = $status,
+    b.updated_at = datetime()
+CREATE (s:ScanEvent {
+    event_id: $event_id,
+    scan_type: $scan_type,
+    location: $location,
+    timestamp: datetime($timestamp)
+})
+CREATE (b)-[:SCANNED_AT]->(s)
+"""
+
+GET_BAG_JOURNEY_CYPHER = """
+MATCH (b:Baggage {bag_tag: $bag_tag})-[:SCANNED_AT]->(s:ScanEvent)
+WITH s ORDER BY s.timestamp
+RETURN collect({
+    location: s.location,
+    scan_type: s.scan_type,
+    timestamp: s.timestamp
+}) as journey
+"""
+
+UPDATE_RISK_SCORE_CYPHER = """
+MATCH (b:Baggage {bag_tag: $bag_tag})
+SET b.risk_score = $risk_score,
+    b.risk_factors = $risk_factors,
+    b.updated_at = datetime()
+"""
+
+# Columns written by SupabaseConnection.copy_scan_events
+SCAN_EVENT_COPY_COLUMNS = ('event_id', 'bag_tag', 'scan_type', 'location', 'timestamp')
+
+# Bag statuses are (de)serialized on every Redis cache read and write;
+# orjson does both in C when installed
+if ORJSON_AVAILABLE:
+    def _dumps_status(status: Dict[str, Any]) -> bytes:
+        return orjson.dumps(status, option=orjson.OPT_NON_STR_KEYS)
+
+    _loads_status = orjson.loads
+else:
+    _dumps_status = json.dumps
+    _loads_status = json.loads
+
+# Process-local bag status cache in front of Redis
+LOCAL_STATUS_CACHE_SIZE = 50000
+LOCAL_STATUS_CACHE_TTL_SECONDS = 5
+
+# Seconds buffered metric increments wait before being written to Redis
+METRIC_FLUSH_INTERVAL = 0.1
+
+
+def _to_copy_value(value: Any) -> Any:
+    """Serialize datetimes to ISO strings for COPY/REST payloads"""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class SupabaseWriteError(Exception):
+    """Raised when a Supabase insert returns no rows"""
+    pass
+
+
+def _first_row(result: Any, table: str) -> Dict[str, Any]:
+    """Return the row written by an insert, failing loudly if there is none"""
+    if not result.data:
+        raise SupabaseWriteError(f"Insert into {table} returned no rows")
+    return result.data[0]
+
+
+def _invalidate_local_status(bag_tag: str):
+    """Drop the process-local cached status of a bag whose state was written"""
+    # Nothing is cached locally until the global Redis cache has been built
+    cache = (_connections or {}).get("redis_cache")
+    if cache is not None:
+        cache.invalidate_bag_status(bag_tag)
 
 
 class Neo4jConnection:
@@ -19,128 +146,196 @@ class Neo4jConnection:
             settings.neo4j_uri,
             auth=(settings.neo4j_user, settings.neo4j_password)
         )
+        # Naming the database up front saves a home-database lookup per query
+        self.database = settings.neo4j_database
         logger.info("Neo4j connection established")
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
     def close(self):
-        """Close the connection"""
+        """Close the connection (safe to call more than once)"""
         if self.driver:
             self.driver.close()
+            self.driver = None
             logger.info("Neo4j connection closed")
     
     def create_digital_twin(self, bag_data: Dict[str, Any]) -> str:
         """Create a digital twin node for a bag"""
-        with self.driver.session() as session:
-            result = session.run("""
-                CREATE (b:Baggage {
-                    bag_tag: $bag_tag,
-                    status: $status,
-                    current_location: $current_location,
-                    passenger_name: $passenger_name,
-                    pnr: $pnr,
-                    routing: $routing,
-                    risk_score: $risk_score,
-                    created_at: datetime($created_at),
-                    updated_at: datetime()
-                })
-                RETURN b.bag_tag as bag_tag
-            """,
-                bag_tag=bag_data['bag_tag'],
-                status=bag_data['status'],
-                current_location=bag_data['current_location'],
-                passenger_name=bag_data['passenger_name'],
-                pnr=bag_data['pnr'],
-                routing=bag_data['routing'],
-                risk_score=bag_data.get('risk_score', 0.0),
-                created_at=bag_data['created_at'].isoformat()
-            )
-            record = result.single()
-            logger.info(f"Digital twin created for bag: {record['bag_tag']}")
-            return record['bag_tag']
+        # No RETURN clause: the caller already knows the tag, so there are
+        # no records to pull back
+        bag_tag = bag_data['bag_tag']
+        self.driver.execute_query(
+            CREATE_DIGITAL_TWIN_CYPHER,
+            bag_tag=bag_tag,
+            status=bag_data['status'],
+            current_location=bag_data['current_location'],
+            passenger_name=bag_data['passenger_name'],
+            pnr=bag_data['pnr'],
+            routing=bag_data['routing'],
+            risk_score=bag_data.get('risk_score', 0.0),
+            created_at=bag_data['created_at'].isoformat(),
+            database_=self.database
+        )
+        logger.info(f"Digital twin created for bag: {bag_tag}")
+        return bag_tag
     
     def update_bag_location(self, bag_tag: str, location: str, status: str):
-        """Update bag location and status"""
-        with self.driver.session() as session:
-            session.run("""
-                MATCH (b:Baggage {bag_tag: $bag_tag})
-                SET b.current_location = $location,
-                    b.status = $status,
-                    b.updated_at = datetime()
-                RETURN b
-            """, bag_tag=bag_tag, location=location, status=status)
-            logger.info(f"Updated bag {bag_tag} location to {location}")
+        """
+        Update bag location and status
+
+        Prefer record_scan() when a scan event is logged at the same time.
+        """
+        self.driver.execute_query(
+            UPDATE_BAG_LOCATION_CYPHER,
+            bag_tag=bag_tag,
+            location=location,
+            status=status,
+            database_=self.database
+        )
+        _invalidate_local_status(bag_tag)
+        logger.info(f"Updated bag {bag_tag} location to {location}")
     
     def add_scan_event(self, bag_tag: str, scan_data: Dict[str, Any]):
         """Add scan event and create relationship"""
-        with self.driver.session() as session:
-            session.run("""
-                MATCH (b:Baggage {bag_tag: $bag_tag})
-                CREATE (s:ScanEvent {
-                    event_id: $event_id,
-                    scan_type: $scan_type,
-                    location: $location,
-                    timestamp: datetime($timestamp)
-                })
-                CREATE (b)-[:SCANNED_AT]->(s)
-                RETURN s
-            """,
-                bag_tag=bag_tag,
-                event_id=scan_data['event_id'],
-                scan_type=scan_data['scan_type'],
-                location=scan_data['location'],
-                timestamp=scan_data['timestamp'].isoformat()
-            )
+        self.driver.execute_query(
+            ADD_SCAN_EVENT_CYPHER,
+            bag_tag=bag_tag,
+            event_id=scan_data['event_id'],
+            scan_type=scan_data['scan_type'],
+            location=scan_data['location'],
+            timestamp=scan_data['timestamp'].isoformat(),
+            database_=self.database
+        )
+    
+    def record_scan(self, bag_tag: str, scan_data: Dict[str, Any]):
+        """Update bag location/status and log the scan event in one transaction"""
+        self.driver.execute_query(
+            RECORD_SCAN_CYPHER,
+            bag_tag=bag_tag,
+            location=scan_data['location'],
+            status=scan_data['status'],
+            event_id=scan_data['event_id'],
+            scan_type=scan_data['scan_type'],
+            timestamp=scan_data['timestamp'].isoformat(),
+            database_=self.database
+        )
+        _invalidate_local_status(bag_tag)
+        logger.info(f"Recorded scan for bag {bag_tag} at {scan_data['location']}")
     
     def get_bag_journey(self, bag_tag: str) -> List[Dict[str, Any]]:
         """Get complete journey history for a bag"""
-        with self.driver.session() as session:
-            result = session.run("""
-                MATCH (b:Baggage {bag_tag: $bag_tag})-[:SCANNED_AT]->(s:ScanEvent)
-                RETURN s.location as location, 
-                       s.scan_type as scan_type,
-                       s.timestamp as timestamp
-                ORDER BY s.timestamp
-            """, bag_tag=bag_tag)
-            
-            return [dict(record) for record in result]
+        # The journey is collected server-side into a single record
+        records, _, _ = self.driver.execute_query(
+            GET_BAG_JOURNEY_CYPHER,
+            bag_tag=bag_tag,
+            database_=self.database,
+            routing_=RoutingControl.READ
+        )
+        
+        return records[0]['journey'] if records else []
     
     def update_risk_score(self, bag_tag: str, risk_score: float, risk_factors: List[str]):
         """Update risk assessment"""
-        with self.driver.session() as session:
-            session.run("""
-                MATCH (b:Baggage {bag_tag: $bag_tag})
-                SET b.risk_score = $risk_score,
-                    b.risk_factors = $risk_factors,
-                    b.updated_at = datetime()
-            """, bag_tag=bag_tag, risk_score=risk_score, risk_factors=risk_factors)
+        self.driver.execute_query(
+            UPDATE_RISK_SCORE_CYPHER,
+            bag_tag=bag_tag,
+            risk_score=risk_score,
+            risk_factors=risk_factors,
+            database_=self.database
+        )
 
 
 class SupabaseConnection:
     """Supabase connection for operational data"""
     
     def __init__(self):
+        # PostgREST's own httpx client already pools keep-alive connections
+        # and negotiates HTTP/2 (h2 comes with the httpx[http2] requirement)
         self.client: Client = create_client(
             settings.supabase_url,
             settings.supabase_key
         )
         logger.info("Supabase connection established")
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Close the underlying HTTP client (safe to call more than once)"""
+        if self.client:
+            self.client.postgrest.session.close()
+            self.client = None
+            logger.info("Supabase connection closed")
+    
     def insert_scan_event(self, scan_event: Dict[str, Any]) -> Dict[str, Any]:
         """Insert scan event into database"""
         result = self.client.table('scan_events').insert(scan_event).execute()
         logger.info(f"Scan event inserted: {scan_event['event_id']}")
-        return result.data[0] if result.data else {}
+        return _first_row(result, 'scan_events')
+    
+    def copy_scan_events(self, events: Iterable[Dict[str, Any]]) -> int:
+        """
+        Bulk load scan events with Postgres COPY
+
+        Meant for initial flight loads and batch reconciliation. Streams
+        the rows straight into Postgres instead of going through PostgREST.
+        Falls back to a single multi-row REST insert when no direct
+        database URL is configured.
+
+        Returns:
+            Number of rows loaded
+        """
+        rows = [
+            [_to_copy_value(event.get(column)) for column in SCAN_EVENT_COPY_COLUMNS]
+            for event in events
+        ]
+        if not rows:
+            return 0
+
+        if not settings.supabase_db_url:
+            records = [dict(zip(SCAN_EVENT_COPY_COLUMNS, row)) for row in rows]
+            self.client.table('scan_events').insert(records).execute()
+            logger.info(f"Bulk inserted {len(rows)} scan events via REST")
+            return len(rows)
+
+        import psycopg2
+
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+
+        conn = psycopg2.connect(settings.supabase_db_url)
+        try:
+            with conn, conn.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY scan_events ({', '.join(SCAN_EVENT_COPY_COLUMNS)}) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+        finally:
+            conn.close()
+
+        logger.info(f"Bulk copied {len(rows)} scan events")
+        return len(rows)
     
     def insert_risk_assessment(self, assessment: Dict[str, Any]) -> Dict[str, Any]:
         """Insert risk assessment"""
         result = self.client.table('risk_assessments').insert(assessment).execute()
         logger.info(f"Risk assessment created for bag: {assessment['bag_tag']}")
-        return result.data[0] if result.data else {}
+        return _first_row(result, 'risk_assessments')
     
     def create_exception_case(self, case_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create exception case"""
         result = self.client.table('exception_cases').insert(case_data).execute()
         logger.info(f"Exception case created: {case_data['case_id']}")
-        return result.data[0] if result.data else {}
+        return _first_row(result, 'exception_cases')
     
     def get_bag_data(self, bag_tag: str) -> Optional[Dict[str, Any]]:
         """Get bag data from database"""
@@ -151,18 +346,18 @@ class SupabaseConnection:
         """Insert WorldTracer PIR"""
         result = self.client.table('worldtracer_pirs').insert(pir_data).execute()
         logger.info(f"WorldTracer PIR created: {pir_data['pir_number']}")
-        return result.data[0] if result.data else {}
+        return _first_row(result, 'worldtracer_pirs')
     
     def create_courier_dispatch(self, dispatch_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create courier dispatch record"""
         result = self.client.table('courier_dispatches').insert(dispatch_data).execute()
         logger.info(f"Courier dispatch created: {dispatch_data['dispatch_id']}")
-        return result.data[0] if result.data else {}
+        return _first_row(result, 'courier_dispatches')
     
     def log_notification(self, notification_data: Dict[str, Any]) -> Dict[str, Any]:
         """Log passenger notification"""
         result = self.client.table('passenger_notifications').insert(notification_data).execute()
-        return result.data[0] if result.data else {}
+        return _first_row(result, 'passenger_notifications')
 
 
 class RedisCache:
@@ -170,48 +365,197 @@ class RedisCache:
     
     def __init__(self):
         self.client = Redis.from_url(settings.redis_url, decode_responses=True)
+        self._metric_buffer: Dict[str, int] = defaultdict(int)
+        self._metric_lock = threading.Lock()
+        self._metric_timer: Optional[threading.Timer] = None
+        # Short-lived process-local copy of bag statuses so hot re-polls
+        # of the same bag skip the Redis round trip. Entries hold the
+        # serialized payload, so every read returns a fresh dict that
+        # callers may mutate without touching the cache.
+        self._local_status = CacheManager(
+            "bag_status",
+            CacheConfig(
+                max_size=LOCAL_STATUS_CACHE_SIZE,
+                default_ttl_seconds=LOCAL_STATUS_CACHE_TTL_SECONDS
+            )
+        )
         logger.info("Redis connection established")
     
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Release pooled connections (safe to call more than once)"""
+        if self.client:
+            self.flush_metrics()
+            self.client.close()
+            self.client = None
+            logger.info("Redis connection closed")
+    
     def cache_bag_status(self, bag_tag: str, status_data: Dict[str, Any], ttl: int = 3600):
         """Cache bag status for quick lookup"""
-        import json
-        self.client.setex(
-            f"bag:{bag_tag}",
-            ttl,
-            json.dumps(status_data)
-        )
+        payload = _dumps_status(status_data)
+        self.client.setex(f"bag:{bag_tag}", ttl, payload)
+        self._local_status.set(bag_tag, payload)
     
     def get_bag_status(self, bag_tag: str) -> Optional[Dict[str, Any]]:
-        """Get cached bag status"""
-        import json
-        data = self.client.get(f"bag:{bag_tag}")
-        return json.loads(data) if data else None
+        """
+        Get cached bag status
+
+        Served from the process-local cache when the bag was read or written
+        in the last LOCAL_STATUS_CACHE_TTL_SECONDS, otherwise from Redis.
+        """
+        data = self._local_status.get(bag_tag)
+        if data is None:
+            data = self.client.get(f"bag:{bag_tag}")
+            if not data:
+                return None
+            self._local_status.set(bag_tag, data)
+        return _loads_status(data)
     
-    def increment_metric(self, metric_name: str):
-        """Increment operational metric"""
-        self.client.incr(f"metric:{metric_name}")
+    def invalidate_bag_status(self, bag_tag: str):
+        """Drop the process-local copy of a bag status"""
+        self._local_status.delete(bag_tag)
+    
+    def cache_bag_statuses(self, statuses: Dict[str, Dict[str, Any]], ttl: int = 3600):
+        """Cache several bag statuses in one round trip"""
+        # Redis has no MSET with expiry, so pipeline the SETEX calls instead
+        payloads = {bag_tag: _dumps_status(status_data) for bag_tag, status_data in statuses.items()}
+        pipe = self.client.pipeline(transaction=False)
+        for bag_tag, payload in payloads.items():
+            pipe.setex(f"bag:{bag_tag}", ttl, payload)
+        pipe.execute()
+        for bag_tag, payload in payloads.items():
+            self._local_status.set(bag_tag, payload)
+    
+    def get_bag_statuses(self, bag_tags: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get cached statuses for several bags
+
+        Bags in the process-local cache are served from it; the rest are
+        read from Redis with a single MGET.
+        """
+        payloads = {bag_tag: self._local_status.get(bag_tag) for bag_tag in bag_tags}
+        misses = [bag_tag for bag_tag, data in payloads.items() if data is None]
+        if misses:
+            values = self.client.mget([f"bag:{bag_tag}" for bag_tag in misses])
+            for bag_tag, data in zip(misses, values):
+                if data:
+                    self._local_status.set(bag_tag, data)
+                payloads[bag_tag] = data
+        return {
+            bag_tag: _loads_status(data)
+            for bag_tag, data in payloads.items()
+            if data
+        }
+    
+    def increment_metric(self, metric_name: str, amount: int = 1):
+        """
+        Increment operational metric
+
+        Increments are buffered in-process and written in one pipelined
+        batch at most METRIC_FLUSH_INTERVAL seconds later.
+        """
+        with self._metric_lock:
+            self._metric_buffer[metric_name] += amount
+            if self._metric_timer is None:
+                self._metric_timer = threading.Timer(METRIC_FLUSH_INTERVAL, self.flush_metrics)
+                self._metric_timer.daemon = True
+                self._metric_timer.start()
+    
+    def flush_metrics(self):
+        """Write buffered metric increments to Redis in one round trip"""
+        with self._metric_lock:
+            buffered, self._metric_buffer = self._metric_buffer, defaultdict(int)
+            timer, self._metric_timer = self._metric_timer, None
+        if timer:
+            timer.cancel()
+        if not buffered or not self.client:
+            return
+        
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for metric_name, amount in buffered.items():
+                pipe.incrby(f"metric:{metric_name}", amount)
+            pipe.execute()
+        except Exception as e:
+            # Keep the counts so the next flush retries them
+            logger.warning(f"Failed to flush metrics (will retry): {e}")
+            with self._metric_lock:
+                for metric_name, amount in buffered.items():
+                    self._metric_buffer[metric_name] += amount
     
     def get_metric(self, metric_name: str) -> int:
         """Get metric value"""
+        self.flush_metrics()
         value = self.client.get(f"metric:{metric_name}")
         return int(value) if value else 0
 
 
-# Global instances with graceful fallback
-try:
-    neo4j_db = Neo4jConnection()
-except Exception as e:
-    logger.warning(f"Neo4j connection failed (will use limited functionality): {e}")
-    neo4j_db = None
+# Global instances with graceful fallback. neo4j_db, supabase_db and
+# redis_cache are built together on first access (see __getattr__), so
+# importing this module never blocks on a connect.
+_CONNECTION_FACTORIES = {
+    "neo4j_db": (Neo4jConnection, "Neo4j connection failed (will use limited functionality)"),
+    "supabase_db": (SupabaseConnection, "Supabase connection failed (will use limited functionality)"),
+    "redis_cache": (RedisCache, "Redis connection failed (will use in-memory cache)"),
+}
 
-try:
-    supabase_db = SupabaseConnection()
-except Exception as e:
-    logger.warning(f"Supabase connection failed (will use limited functionality): {e}")
-    supabase_db = None
+_connections: Optional[Dict[str, Any]] = None
+_connections_lock = threading.Lock()
 
-try:
-    redis_cache = RedisCache()
-except Exception as e:
-    logger.warning(f"Redis connection failed (will use in-memory cache): {e}")
-    redis_cache = None
+
+def _connect(name: str) -> Any:
+    """Build one global connection, or None if it could not connect"""
+    factory, failure = _CONNECTION_FACTORIES[name]
+    try:
+        return factory()
+    except Exception as e:
+        logger.warning(f"{failure}: {e}")
+        return None
+
+
+def get_connections() -> Dict[str, Any]:
+    """
+    Get the global connection instances, keyed by attribute name
+
+    Built once, on first use, with the three connects overlapped in a
+    thread pool. A backend that could not connect maps to None.
+    """
+    global _connections
+    if _connections is None:
+        with _connections_lock:
+            if _connections is None:
+                names = list(_CONNECTION_FACTORIES)
+                with ThreadPoolExecutor(max_workers=len(names)) as pool:
+                    _connections = dict(zip(names, pool.map(_connect, names)))
+    return _connections
+
+
+def __getattr__(name: str) -> Any:
+    """Lazily build the global connection instances (PEP 562)"""
+    if name in _CONNECTION_FACTORIES:
+        return get_connections()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _close_at_exit():
+    """
+    Release pooled connections on interpreter shutdown
+
+    Log sinks (pytest capture, loguru file handlers) may already be closed
+    by the time atexit hooks run, so this module's close messages are
+    silenced first.
+    """
+    if _connections is None:
+        return
+    logger.disable(__name__)
+    for connection in _connections.values():
+        if connection is not None:
+            connection.close()
+
+
+atexit.register(_close_at_exit)
@@ -1,47 +1,99 @@
 """
 Database connection utilities with graceful fallbacks for serverless
+
+``neo4j_db``, ``supabase_db`` and ``redis_cache`` are resolved lazily on
+first access so that importing this module never blocks a cold start.
+They are the global instances of ``utils.database``, which opens the three
+connections concurrently on first use (None when a backend could not
+connect), so each backend keeps a single client.
 """
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, List
 from loguru import logger
 from config.settings import settings
 
-# Initialize connections as None
-neo4j_db = None
-supabase_db = None
-redis_cache = None
-
-# Try to import and initialize connections
-try:
-    from neo4j import GraphDatabase
-    from utils.database import Neo4jConnection
-    neo4j_db = Neo4jConnection()
-    logger.info("✓ Neo4j connected")
-except Exception as e:
-    logger.warning(f"Neo4j not available: {e}")
-    neo4j_db = None
-
-try:
-    from supabase import create_client
-    from utils.database import SupabaseConnection
-    supabase_db = SupabaseConnection()
-    logger.info("✓ Supabase connected")
-except Exception as e:
-    logger.warning(f"Supabase not available: {e}")
-    supabase_db = None
-
-try:
-    from redis import Redis
-    from utils.database import RedisCache
-    redis_cache = RedisCache()
-    logger.info("✓ Redis connected")
-except Exception as e:
-    logger.warning(f"Redis not available: {e}")
-    redis_cache = None
+# How long is_database_available() may reuse its last answer
+AVAILABILITY_CACHE_SECONDS = 60
+
+_BACKEND_NAMES = {
+    "neo4j_db": "neo4j",
+    "supabase_db": "supabase",
+    "redis_cache": "redis",
+}
+
+_availability: Optional[Dict[str, bool]] = None
+_availability_checked_at = 0.0
+_availability_lock = threading.Lock()
+
+
+def _initialize_connections() -> Dict[str, Any]:
+    """Get the utils.database connections, opening them on first use"""
+    try:
+        from utils import database
+    except Exception as e:
+        logger.warning(f"Databases not available: {e}")
+        return dict.fromkeys(_BACKEND_NAMES)
+    return database.get_connections()
+
+
+def __getattr__(name: str) -> Any:
+    """Lazily resolve the global connection instances (PEP 562)"""
+    if name in _BACKEND_NAMES:
+        return _initialize_connections()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _probe_neo4j(conn) -> None:
+    conn.driver.verify_connectivity()
+
+
+def _probe_supabase(conn) -> None:
+    conn.client.table('baggage').select('bag_tag').limit(1).execute()
+
+
+def _probe_redis(conn) -> None:
+    conn.client.ping()
+
+
+_PROBES = {
+    "neo4j_db": _probe_neo4j,
+    "supabase_db": _probe_supabase,
+    "redis_cache": _probe_redis,
+}
+
+
+def _check(name: str, conn: Any) -> bool:
+    """Run one backend's connectivity probe"""
+    if conn is None:
+        return False
+    try:
+        _PROBES[name](conn)
+        return True
+    except Exception as e:
+        logger.warning(f"{_BACKEND_NAMES[name]} connectivity check failed: {e}")
+        return False
+
 
 def is_database_available() -> Dict[str, bool]:
-    """Check which databases are available"""
-    return {
-        "neo4j": neo4j_db is not None,
-        "supabase": supabase_db is not None,
-        "redis": redis_cache is not None
-    }
+    """
+    Check which databases are reachable
+
+    The three probes run concurrently, and their answer is reused for
+    AVAILABILITY_CACHE_SECONDS.
+    """
+    global _availability, _availability_checked_at
+
+    with _availability_lock:
+        age = time.monotonic() - _availability_checked_at
+        if _availability is None or age >= AVAILABILITY_CACHE_SECONDS:
+            connections = _initialize_connections()
+            names = list(_BACKEND_NAMES)
+            with ThreadPoolExecutor(max_workers=len(names)) as pool:
+                reachable = pool.map(lambda name: _check(name, connections[name]), names)
+            _availability = {
+                _BACKEND_NAMES[name]: ok for name, ok in zip(names, reachable)
+            }
+            _availability_checked_at = time.monotonic()
+        return dict(_availability)
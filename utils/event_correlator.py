@@ -16,10 +16,16 @@ Version: 1.0.0
 Date: 2024-11-13
 """
 
-from typing import List, Dict, Optional, Any, Set, Tuple
+import bisect
+import math
+import sys
+from itertools import islice
+from operator import itemgetter
+from typing import List, Dict, Optional, Any, Set, Tuple, Deque, Iterable
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import Counter, defaultdict, deque
 from dataclasses import dataclass, field
+import numpy as np
 from loguru import logger
 
 from models.event_ontology import (
@@ -28,8 +34,100 @@ from models.event_ontology import (
     get_event_definition
 )
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
-@dataclass
+# Width of the time buckets used for pattern detection
+TIME_BUCKET_SECONDS = 15 * 60
+
+# Enum values hoisted out of the per-event grouping code
+_EXCEPTION = ScanEventType.EXCEPTION.value
+_TIME_GAP = ScanAnomaly.TIME_GAP.value
+
+# Minute-resolution label used in group ids
+GROUP_LABEL_FORMAT = '%Y%m%d_%H%M'
+
+# Event fields used as index/grouping keys, interned at ingress
+INTERNED_EVENT_FIELDS = ('location', 'flight_number', 'exception_type', 'scan_type')
+
+# Inserts between full sweeps of the correlation indices
+FULL_SWEEP_INTERVAL = 1024
+
+# Sort key of the index deques
+_ts_epoch = itemgetter('ts_epoch')
+
+MAX_PATTERN_CONFIDENCE = 0.95
+
+
+def pattern_confidence(
+    group_size: int,
+    category_total: int,
+    event_count: int,
+    min_events: float
+) -> float:
+    """
+    Score the confidence of one pattern in one time bucket
+
+    The confidence is the geometric mean of three sub-probabilities for the
+    pattern's largest group:
+
+    - concentration: group size / events in the bucket
+    - sample size: 1 - exp(-group size / min_events)
+    - purity: group size / all events of that pattern's kind in the bucket
+
+    Args:
+        group_size: Events in the largest group
+        category_total: Events of the pattern's kind in the bucket
+        event_count: Events in the bucket
+        min_events: Minimum events needed to detect a pattern
+
+    Returns:
+        Confidence, capped at MAX_PATTERN_CONFIDENCE
+    """
+    concentration = group_size / max(event_count, 1)
+    sample_size = 1.0 - math.exp(-group_size / min_events)
+    purity = group_size / max(category_total, 1)
+    return min(MAX_PATTERN_CONFIDENCE, math.cbrt(concentration * sample_size * purity))
+
+
+def score_buckets(counts: np.ndarray, min_events: float) -> np.ndarray:
+    """
+    Score pattern confidence for many time buckets at once
+
+    Vectorised pattern_confidence() for batch passes; live detection scores
+    a single bucket and uses the scalar version.
+
+    Args:
+        counts: int64 array of shape (n_buckets, 7) holding, per bucket, the
+            total event count followed by (largest group, category total)
+            pairs for misroutes, delays and exceptions
+        min_events: Minimum events needed to detect a pattern
+
+    Returns:
+        float64 array of shape (n_buckets, 3) with the bulk_misroute,
+        systematic_delay and mass_exception confidences
+    """
+    totals = counts[:, 0:1].astype(np.float64)
+    groups = counts[:, 1::2].astype(np.float64)
+    categories = counts[:, 2::2].astype(np.float64)
+
+    concentration = groups / np.maximum(totals, 1.0)
+    sample_size = 1.0 - np.exp(-groups / min_events)
+    purity = groups / np.maximum(categories, 1.0)
+
+    return np.minimum(
+        MAX_PATTERN_CONFIDENCE, np.cbrt(concentration * sample_size * purity)
+    )
+
+
+if NUMBA_AVAILABLE:
+    score_buckets = njit(cache=True)(score_buckets)
+
+
+@dataclass(slots=True)
 class CorrelatedEventGroup:
     """Group of correlated events"""
 
@@ -52,7 +150,7 @@ class CorrelatedEventGroup:
 
     # Action recommendations
     requires_batch_action: bool = False
-    recommended_actions: List[str] = field(default_factory=list)
+    recommended_actions: Optional[List[str]] = None  # Only set on pattern groups
     priority: str = "MEDIUM"  # LOW, MEDIUM, HIGH, CRITICAL
 
     # Metrics
@@ -60,6 +158,140 @@ class CorrelatedEventGroup:
     anomaly_count: int = 0
     avg_delay_minutes: float = 0.0
 
+    # 128-bit Bloom filter over bag_tags, set when the group is cached
+    bag_bloom: int = 0
+
+
+def _bag_bloom_bits(bag_tag: str) -> int:
+    """Two Bloom filter bits (of 128) for a bag tag"""
+    h = hash(bag_tag)
+    return (1 << (h & 127)) | (1 << ((h >> 7) & 127))
+
+
+def _bag_bloom(bag_tags: Iterable[str]) -> int:
+    """Bloom filter of a pattern's bag tags"""
+    bloom = 0
+    for tag in bag_tags:
+        bloom |= _bag_bloom_bits(tag)
+    return bloom
+
+
+@dataclass
+class _PatternAggregate:
+    """
+    Groupings of a time bucket's events used by the pattern detectors
+
+    Maintained incrementally: events are added as they are indexed and
+    removed as they are evicted from the bucket (oldest first), so the
+    detectors only look up the groupings.
+    """
+
+    event_count: int = 0
+
+    # Misrouted bags (EXCEPTION scans with a misroute exception type)
+    misroute_count: int = 0
+    misroutes_by_location: Dict[Optional[str], Deque[Dict[str, Any]]] = field(
+        default_factory=lambda: defaultdict(deque)
+    )
+
+    # Events the validator flagged with a time gap
+    delay_count: int = 0
+    delays_by_location: Dict[str, Deque[Dict[str, Any]]] = field(
+        default_factory=lambda: defaultdict(deque)
+    )
+
+    # All EXCEPTION scans, plus where each exception type occurred
+    exception_count: int = 0
+    exceptions_by_type: Dict[str, Deque[Dict[str, Any]]] = field(
+        default_factory=lambda: defaultdict(deque)
+    )
+    exception_locations: Dict[str, Counter] = field(
+        default_factory=lambda: defaultdict(Counter)
+    )
+
+    def add(self, event: Dict[str, Any]):
+        """Fold one event into every grouping"""
+        self.event_count += 1
+
+        if event.get('scan_type') == _EXCEPTION:
+            exc_type = event.get('exception_type', 'unknown')
+            self.exception_count += 1
+            self.exceptions_by_type[exc_type].append(event)
+            if event.get('location'):
+                self.exception_locations[exc_type][event['location']] += 1
+
+            if 'misroute' in (event.get('exception_type') or '').lower():
+                self.misroute_count += 1
+                self.misroutes_by_location[event.get('location')].append(event)
+
+        if _TIME_GAP in event.get('anomaly_set', ()):
+            self.delay_count += 1
+            self.delays_by_location[event.get('location', 'unknown')].append(event)
+
+    def remove(self, event: Dict[str, Any]):
+        """Undo add() for the oldest event still in the bucket"""
+        self.event_count -= 1
+
+        if event.get('scan_type') == _EXCEPTION:
+            exc_type = event.get('exception_type', 'unknown')
+            self.exception_count -= 1
+            self._discard(self.exceptions_by_type, exc_type, event)
+            if event.get('location'):
+                type_locations = self.exception_locations[exc_type]
+                type_locations[event['location']] -= 1
+                if type_locations[event['location']] <= 0:
+                    del type_locations[event['location']]
+                if not type_locations:
+                    del self.exception_locations[exc_type]
+
+            if 'misroute' in (event.get('exception_type') or '').lower():
+                self.misroute_count -= 1
+                self._discard(self.misroutes_by_location, event.get('location'), event)
+
+        if _TIME_GAP in event.get('anomaly_set', ()):
+            self.delay_count -= 1
+            self._discard(self.delays_by_location, event.get('location', 'unknown'), event)
+
+    @staticmethod
+    def _discard(
+        groups: Dict[Any, Deque[Dict[str, Any]]],
+        key: Any,
+        event: Dict[str, Any]
+    ):
+        """Drop event from its group, and the group once it is empty"""
+        events = groups.get(key)
+        if not events:
+            return
+        # Evictions are oldest-first, so the event is normally at the head
+        if events[0] is event:
+            events.popleft()
+        else:
+            try:
+                events.remove(event)
+            except ValueError:
+                pass
+        if not events:
+            del groups[key]
+
+
+def _largest_group(
+    groups: Dict[Any, Deque[Dict[str, Any]]]
+) -> Tuple[Optional[Any], Deque[Dict[str, Any]]]:
+    """Return the (key, events) pair with the most events, or (None, empty)"""
+    if not groups:
+        return None, deque()
+    return max(groups.items(), key=lambda item: len(item[1]))
+
+
+def _pattern_counts(aggregate: _PatternAggregate) -> Tuple[int, ...]:
+    """Return one score_buckets() row for a bucket's groupings"""
+    return (
+        aggregate.event_count,
+        len(_largest_group(aggregate.misroutes_by_location)[1]), aggregate.misroute_count,
+        len(_largest_group(aggregate.delays_by_location)[1]), aggregate.delay_count,
+        len(_largest_group(aggregate.exceptions_by_type)[1]), aggregate.exception_count
+    )
+
 
 class EventCorrelationEngine:
     """
@@ -76,7 +308,8 @@ class EventCorrelationEngine:
         self,
         correlation_window_minutes: int = 30,
         min_events_for_pattern: int = 5,
-        pattern_confidence_threshold: float = 0.7
+        pattern_confidence_threshold: float = 0.7,
+        pattern_rescan_interval: int = 5
     ):
         """
         Initialize correlation engine
@@ -85,18 +318,42 @@ class EventCorrelationEngine:
             correlation_window_minutes: Time window for correlating events
             min_events_for_pattern: Minimum events needed to detect a pattern
             pattern_confidence_threshold: Confidence threshold for pattern detection
+            pattern_rescan_interval: New events a time bucket must gain before
+                pattern detection runs on it again
         """
         self.correlation_window = timedelta(minutes=correlation_window_minutes)
+        self._window_seconds = self.correlation_window.total_seconds()
         self.min_events_for_pattern = min_events_for_pattern
         self.pattern_threshold = pattern_confidence_threshold
+        self.pattern_rescan_interval = max(1, pattern_rescan_interval)
+
+        # Correlation indices for fast lookups. Each value is a deque kept
+        # in timestamp order (late events are inserted in place), so
+        # expired events pop off the head and a window is a bisected slice.
+        self.flight_index: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self.location_index: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self.time_buckets: Dict[int, Deque[Dict[str, Any]]] = defaultdict(deque)
+
+        # Pattern groupings for each time bucket, kept in step with it
+        self._bucket_aggregates: Dict[int, _PatternAggregate] = defaultdict(_PatternAggregate)
+
+        # Bucket size at the last pattern scan, per time bucket
+        self._bucket_last_scan_size: Dict[int, int] = {}
+
+        # Inserts since the last full index sweep
+        self._inserts_since_sweep = 0
 
-        # Correlation indices for fast lookups
-        self.flight_index: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-        self.location_index: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-        self.time_buckets: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        # Newest event timestamp seen (epoch seconds); retention is measured
+        # from it so a late event cannot shrink or regrow the indices
+        self._latest_epoch = float('-inf')
 
-        # Detected patterns cache
+        # Detected patterns cache, in detected_at order. _detected_at_epoch
+        # mirrors it for bisecting; _pattern_slots maps a group_id to its
+        # sequence number (list index + _patterns_trimmed).
         self.detected_patterns: List[CorrelatedEventGroup] = []
+        self._detected_at_epoch: List[float] = []
+        self._pattern_slots: Dict[str, int] = {}
+        self._patterns_trimmed = 0
 
         logger.info(
             f"EventCorrelationEngine initialized: "
@@ -122,39 +379,45 @@ class EventCorrelationEngine:
         """
         correlations: List[CorrelatedEventGroup] = []
 
+        # Add to indices
+        event_with_meta = self._prepare_event(event, bag_tag)
+        timestamp = event_with_meta['ts']
+
         # Extract event properties
-        scan_type = event.get('scan_type', '')
-        location = event.get('location', '')
-        flight = event.get('flight_number', '')
-        timestamp_str = event.get('timestamp', '')
+        scan_type = event_with_meta.get('scan_type', '')
+        location = event_with_meta.get('location', '')
+        flight = event_with_meta.get('flight_number', '')
 
-        try:
-            timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-        except (ValueError, TypeError):
-            timestamp = datetime.now()
+        # Fold into the bucket's pattern groupings before touching any index,
+        # so an event that fails here leaves the indices consistent
+        time_bucket = self._get_time_bucket(timestamp)
+        self._bucket_aggregates[time_bucket].add(event_with_meta)
 
-        # Add to indices
-        event_with_meta = {
-            **event,
-            'bag_tag': bag_tag,
-            'indexed_at': datetime.now()
-        }
+        # Indices retain 2 windows behind the newest event, so groups are
+        # exact for events that arrive up to one window late
+        self._latest_epoch = max(self._latest_epoch, event_with_meta['ts_epoch'])
+        retain_from = self._latest_epoch - self._window_seconds * 2
 
         if flight:
-            self.flight_index[flight].append(event_with_meta)
+            self._insert_by_time(self.flight_index[flight], event_with_meta)
+            self._evict(self.flight_index[flight], retain_from)
 
         if location:
-            self.location_index[location].append(event_with_meta)
+            self._insert_by_time(self.location_index[location], event_with_meta)
+            self._evict(self.location_index[location], retain_from)
 
-        time_bucket = self._get_time_bucket(timestamp)
-        self.time_buckets[time_bucket].append(event_with_meta)
+        self._insert_by_time(self.time_buckets[time_bucket], event_with_meta)
+        self._evict_bucket(time_bucket, retain_from)
+
+        # Formatted once per event for every group id built below
+        group_label = self._group_label(timestamp)
 
         # Find correlations by flight
         if flight:
             flight_correlation = self._correlate_by_flight(
                 event_with_meta,
                 flight,
-                timestamp
+                group_label
             )
             if flight_correlation:
                 correlations.append(flight_correlation)
@@ -164,17 +427,26 @@ class EventCorrelationEngine:
             location_correlation = self._correlate_by_location(
                 event_with_meta,
                 location,
-                timestamp
+                group_label
             )
             if location_correlation:
                 correlations.append(location_correlation)
 
-        # Detect patterns across correlations
-        patterns = self._detect_patterns(timestamp)
-        correlations.extend(patterns)
-
-        # Clean up old events from indices
-        self._cleanup_old_events(timestamp)
+        # Detect patterns across correlations, only once the bucket has
+        # grown enough since its last scan to possibly change the outcome
+        bucket_size = len(self.time_buckets[time_bucket])
+        if bucket_size - self._bucket_last_scan_size.get(time_bucket, 0) >= self.pattern_rescan_interval:
+            self._bucket_last_scan_size[time_bucket] = bucket_size
+            patterns = self._detect_patterns(timestamp, group_label)
+            self._record_patterns(patterns)
+            correlations.extend(patterns)
+
+        # Deques touched by this event were trimmed above; untouched keys
+        # are only swept every FULL_SWEEP_INTERVAL inserts
+        self._inserts_since_sweep += 1
+        if self._inserts_since_sweep >= FULL_SWEEP_INTERVAL:
+            self._inserts_since_sweep = 0
+            self._cleanup_old_events(timestamp)
 
         logger.debug(
             f"Correlated event {scan_type} for {bag_tag}: "
@@ -183,21 +455,102 @@ class EventCorrelationEngine:
 
         return correlations
 
+    def _prepare_event(self, event: Dict[str, Any], bag_tag: str) -> Dict[str, Any]:
+        """Copy an incoming event and attach the metadata the indices rely on"""
+
+        # Parsed once here and cached on the indexed event as 'ts', with its
+        # epoch seconds as 'ts_epoch' for cheap float comparisons
+        try:
+            timestamp = self._parse_timestamp(event.get('timestamp', ''))
+        except (ValueError, TypeError):
+            timestamp = datetime.now()
+
+        event_with_meta = {
+            **event,
+            'bag_tag': bag_tag,
+            'indexed_at': datetime.now(),
+            'ts': timestamp,
+            'ts_epoch': timestamp.timestamp()
+        }
+
+        # Intern the key fields so every downstream dict/set lookup can
+        # short-circuit on identity
+        for key in INTERNED_EVENT_FIELDS:
+            value = event_with_meta.get(key)
+            if type(value) is str:
+                event_with_meta[key] = sys.intern(value)
+
+        # Validator anomalies as a set for O(1) membership tests. Kept in its
+        # own field so the caller's validation_result is left untouched.
+        validation_result = event.get('validation_result')
+        if validation_result:
+            event_with_meta['anomaly_set'] = frozenset(validation_result.get('anomalies', ()))
+
+        return event_with_meta
+
+    def replay(self, events: Iterable[Dict[str, Any]]) -> List[CorrelatedEventGroup]:
+        """
+        Run pattern detection over a batch of historical events
+
+        Intended for retrospective analysis (e.g. re-scanning the last day
+        after a restart or reconfiguration). Events are grouped into time
+        buckets, the groupings of every bucket are built, and all bucket
+        confidences are scored together in one vectorised pass. The live
+        indices and pattern cache are not touched.
+
+        Replay is intentionally serial: building the groupings is pure
+        Python and holds the GIL, so worker threads only add overhead, and
+        the scoring that vectorises is already done in a single pass.
+        Each bucket is labelled by its last event in arrival order, the
+        event whose scan the live path would finish the bucket on, so
+        group ids match correlate_event for the same input.
+
+        Args:
+            events: Scan events, each carrying its 'bag_tag'
+
+        Returns:
+            Patterns detected, in bucket order
+        """
+        buckets: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for event in events:
+            event_with_meta = self._prepare_event(event, event.get('bag_tag', ''))
+            buckets[self._get_time_bucket(event_with_meta['ts'])].append(event_with_meta)
+
+        aggregates: List[_PatternAggregate] = []
+        group_labels: List[str] = []
+        for key in sorted(buckets):
+            bucket_events = buckets[key]
+            if len(bucket_events) < self.min_events_for_pattern:
+                continue
+            aggregate = _PatternAggregate()
+            for event in bucket_events:
+                aggregate.add(event)
+            aggregates.append(aggregate)
+            group_labels.append(self._group_label(bucket_events[-1]['ts']))
+
+        if not aggregates:
+            return []
+
+        counts = np.array([_pattern_counts(a) for a in aggregates], dtype=np.int64)
+        confidences = score_buckets(counts, float(self.min_events_for_pattern))
+
+        patterns: List[CorrelatedEventGroup] = []
+        for aggregate, group_label, bucket_confidences in zip(aggregates, group_labels, confidences):
+            patterns.extend(
+                self._detect_aggregate_patterns(aggregate, group_label, bucket_confidences.tolist())
+            )
+        return patterns
+
     def _correlate_by_flight(
         self,
         event: Dict[str, Any],
         flight: str,
-        timestamp: datetime
+        group_label: str
     ) -> Optional[CorrelatedEventGroup]:
         """Correlate events by flight number"""
 
-        flight_events = self.flight_index.get(flight, [])
-
-        # Filter events within time window
-        recent_events = [
-            e for e in flight_events
-            if self._is_within_window(e, timestamp)
-        ]
+        # Events within one correlation window either side of this one
+        recent_events = self._window_events(self.flight_index.get(flight, ()), event['ts_epoch'])
 
         if len(recent_events) < 2:
             return None
@@ -206,14 +559,14 @@ class EventCorrelationEngine:
         bag_tags = {e['bag_tag'] for e in recent_events}
 
         group = CorrelatedEventGroup(
-            group_id=f"flight_{flight}_{timestamp.strftime('%Y%m%d_%H%M')}",
+            group_id=f"flight_{flight}_{group_label}",
             correlation_type="same_flight",
             events=recent_events,
             bag_tags=bag_tags,
             flight_number=flight,
             location=event.get('location'),
-            time_window_start=min(self._get_timestamp(e) for e in recent_events),
-            time_window_end=max(self._get_timestamp(e) for e in recent_events),
+            time_window_start=min(e['ts'] for e in recent_events),
+            time_window_end=max(e['ts'] for e in recent_events),
             affected_bag_count=len(bag_tags)
         )
 
@@ -223,17 +576,12 @@ class EventCorrelationEngine:
         self,
         event: Dict[str, Any],
         location: str,
-        timestamp: datetime
+        group_label: str
     ) -> Optional[CorrelatedEventGroup]:
         """Correlate events by location"""
 
-        location_events = self.location_index.get(location, [])
-
-        # Filter events within time window
-        recent_events = [
-            e for e in location_events
-            if self._is_within_window(e, timestamp)
-        ]
+        # Events within one correlation window either side of this one
+        recent_events = self._window_events(self.location_index.get(location, ()), event['ts_epoch'])
 
         if len(recent_events) < self.min_events_for_pattern:
             return None
@@ -242,41 +590,83 @@ class EventCorrelationEngine:
         bag_tags = {e['bag_tag'] for e in recent_events}
 
         group = CorrelatedEventGroup(
-            group_id=f"location_{location}_{timestamp.strftime('%Y%m%d_%H%M')}",
+            group_id=f"location_{location}_{group_label}",
             correlation_type="same_location",
             events=recent_events,
             bag_tags=bag_tags,
             location=location,
-            time_window_start=min(self._get_timestamp(e) for e in recent_events),
-            time_window_end=max(self._get_timestamp(e) for e in recent_events),
+            time_window_start=min(e['ts'] for e in recent_events),
+            time_window_end=max(e['ts'] for e in recent_events),
             affected_bag_count=len(bag_tags)
         )
 
         return group
 
-    def _detect_patterns(self, timestamp: datetime) -> List[CorrelatedEventGroup]:
+    def _detect_patterns(
+        self,
+        timestamp: datetime,
+        group_label: str
+    ) -> List[CorrelatedEventGroup]:
         """Detect patterns across all recent events"""
-        patterns: List[CorrelatedEventGroup] = []
 
         # Get all recent events
         time_bucket = self._get_time_bucket(timestamp)
-        recent_events = self.time_buckets.get(time_bucket, [])
+        recent_events = self.time_buckets.get(time_bucket, ())
 
         if len(recent_events) < self.min_events_for_pattern:
-            return patterns
+            return []
+
+        # Groupings were maintained as events entered and left the bucket
+        return self._detect_aggregate_patterns(self._bucket_aggregates[time_bucket], group_label)
+
+    def _detect_aggregate_patterns(
+        self,
+        aggregate: _PatternAggregate,
+        group_label: str,
+        confidences: Optional[List[float]] = None
+    ) -> List[CorrelatedEventGroup]:
+        """
+        Run the pattern detectors over one bucket's groupings
+
+        confidences holds precomputed (bulk_misroute, systematic_delay,
+        mass_exception) scores from a batch pass; otherwise they are scored
+        here.
+        """
+        patterns: List[CorrelatedEventGroup] = []
+
+        misroutes = _largest_group(aggregate.misroutes_by_location)
+        delays = _largest_group(aggregate.delays_by_location)
+        exceptions = _largest_group(aggregate.exceptions_by_type)
+
+        if confidences is not None:
+            misroute_conf, delay_conf, exception_conf = confidences
+        else:
+            min_events = float(self.min_events_for_pattern)
+            event_count = aggregate.event_count
+            misroute_conf = pattern_confidence(
+                len(misroutes[1]), aggregate.misroute_count, event_count, min_events
+            )
+            delay_conf = pattern_confidence(
+                len(delays[1]), aggregate.delay_count, event_count, min_events
+            )
+            exception_conf = pattern_confidence(
+                len(exceptions[1]), aggregate.exception_count, event_count, min_events
+            )
 
         # Detect bulk misrouting
-        bulk_misroute = self._detect_bulk_misroute(recent_events, timestamp)
+        bulk_misroute = self._detect_bulk_misroute(misroutes, misroute_conf, group_label)
         if bulk_misroute:
             patterns.append(bulk_misroute)
 
         # Detect systematic delays
-        systematic_delay = self._detect_systematic_delay(recent_events, timestamp)
+        systematic_delay = self._detect_systematic_delay(delays, delay_conf, group_label)
         if systematic_delay:
             patterns.append(systematic_delay)
 
         # Detect mass exceptions
-        mass_exception = self._detect_mass_exception(recent_events, timestamp)
+        mass_exception = self._detect_mass_exception(
+            exceptions, exception_conf, aggregate, group_label
+        )
         if mass_exception:
             patterns.append(mass_exception)
 
@@ -284,46 +674,29 @@ class EventCorrelationEngine:
 
     def _detect_bulk_misroute(
         self,
-        events: List[Dict[str, Any]],
-        timestamp: datetime
+        misroutes: Tuple[Optional[str], Deque[Dict[str, Any]]],
+        confidence: float,
+        group_label: str
     ) -> Optional[CorrelatedEventGroup]:
         """Detect bulk misrouting pattern"""
 
-        # Look for multiple bags routed to wrong flight/destination
-        misroute_events = [
-            e for e in events
-            if e.get('scan_type') == ScanEventType.EXCEPTION.value
-            and 'misroute' in e.get('exception_type', '').lower()
-        ]
-
-        if len(misroute_events) < self.min_events_for_pattern:
-            return None
-
-        # Check if they share common attributes (location, time window)
-        locations = [e.get('location') for e in misroute_events]
-        most_common_location = max(set(locations), key=locations.count)
-
-        location_misroutes = [
-            e for e in misroute_events
-            if e.get('location') == most_common_location
-        ]
+        # Look for multiple bags routed to wrong flight/destination,
+        # concentrated at one location
+        most_common_location, location_misroutes = misroutes
 
         if len(location_misroutes) < self.min_events_for_pattern:
             return None
 
-        bag_tags = {e['bag_tag'] for e in location_misroutes}
-
-        # Calculate confidence based on concentration
-        confidence = min(0.95, len(location_misroutes) / len(events) * 2.0)
-
         if confidence < self.pattern_threshold:
             return None
 
+        bag_tags = {e['bag_tag'] for e in location_misroutes}
+
         group = CorrelatedEventGroup(
-            group_id=f"bulk_misroute_{most_common_location}_{timestamp.strftime('%Y%m%d_%H%M')}",
+            group_id=f"bulk_misroute_{most_common_location}_{group_label}",
             correlation_type="pattern",
             pattern_type="bulk_misroute",
-            events=location_misroutes,
+            events=list(location_misroutes),
             bag_tags=bag_tags,
             location=most_common_location,
             confidence=confidence,
@@ -349,39 +722,20 @@ class EventCorrelationEngine:
 
     def _detect_systematic_delay(
         self,
-        events: List[Dict[str, Any]],
-        timestamp: datetime
+        delays: Tuple[Optional[str], Deque[Dict[str, Any]]],
+        confidence: float,
+        group_label: str
     ) -> Optional[CorrelatedEventGroup]:
         """Detect systematic delay pattern"""
 
-        # Look for events with timing anomalies
-        delayed_events = []
+        # Location with the most timing anomalies
+        # (These would typically come from the validator)
+        most_delayed_location, location_delay_events = delays
 
-        for event in events:
-            # Check if event has timing anomaly
-            # (This would typically come from the validator)
-            if 'validation_result' in event:
-                anomalies = event['validation_result'].get('anomalies', [])
-                if ScanAnomaly.TIME_GAP.value in anomalies:
-                    delayed_events.append(event)
-
-        if len(delayed_events) < self.min_events_for_pattern:
-            return None
-
-        # Group by location to find systematic location-based delays
-        location_delays: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-        for event in delayed_events:
-            location = event.get('location', 'unknown')
-            location_delays[location].append(event)
-
-        # Find location with most delays
-        if not location_delays:
+        if len(location_delay_events) < self.min_events_for_pattern:
             return None
 
-        most_delayed_location = max(location_delays.keys(), key=lambda k: len(location_delays[k]))
-        location_delay_events = location_delays[most_delayed_location]
-
-        if len(location_delay_events) < self.min_events_for_pattern:
+        if confidence < self.pattern_threshold:
             return None
 
         bag_tags = {e['bag_tag'] for e in location_delay_events}
@@ -390,16 +744,11 @@ class EventCorrelationEngine:
         # (This is a simplified calculation - would need actual delay values)
         avg_delay = 45.0  # Placeholder
 
-        confidence = min(0.95, len(location_delay_events) / len(events) * 2.5)
-
-        if confidence < self.pattern_threshold:
-            return None
-
         group = CorrelatedEventGroup(
-            group_id=f"systematic_delay_{most_delayed_location}_{timestamp.strftime('%Y%m%d_%H%M')}",
+            group_id=f"systematic_delay_{most_delayed_location}_{group_label}",
             correlation_type="pattern",
             pattern_type="systematic_delay",
-            events=location_delay_events,
+            events=list(location_delay_events),
             bag_tags=bag_tags,
             location=most_delayed_location,
             confidence=confidence,
@@ -426,52 +775,33 @@ class EventCorrelationEngine:
 
     def _detect_mass_exception(
         self,
-        events: List[Dict[str, Any]],
-        timestamp: datetime
+        exceptions: Tuple[Optional[str], Deque[Dict[str, Any]]],
+        confidence: float,
+        aggregate: _PatternAggregate,
+        group_label: str
     ) -> Optional[CorrelatedEventGroup]:
         """Detect mass exception pattern"""
 
-        # Look for multiple exception scans
-        exception_events = [
-            e for e in events
-            if e.get('scan_type') == ScanEventType.EXCEPTION.value
-        ]
-
-        if len(exception_events) < self.min_events_for_pattern:
-            return None
-
-        # Group by exception type
-        exception_types: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-        for event in exception_events:
-            exc_type = event.get('exception_type', 'unknown')
-            exception_types[exc_type].append(event)
-
-        # Find most common exception type
-        if not exception_types:
-            return None
-
-        most_common_type = max(exception_types.keys(), key=lambda k: len(exception_types[k]))
-        type_events = exception_types[most_common_type]
+        # Most common exception type among exception scans
+        most_common_type, type_events = exceptions
 
         if len(type_events) < self.min_events_for_pattern:
             return None
 
-        bag_tags = {e['bag_tag'] for e in type_events}
-
-        confidence = min(0.95, len(type_events) / len(events) * 2.0)
-
         if confidence < self.pattern_threshold:
             return None
 
+        bag_tags = {e['bag_tag'] for e in type_events}
+
         # Determine location if common
-        locations = [e.get('location') for e in type_events if e.get('location')]
-        most_common_location = max(set(locations), key=locations.count) if locations else None
+        type_locations = aggregate.exception_locations[most_common_type]
+        most_common_location = type_locations.most_common(1)[0][0] if type_locations else None
 
         group = CorrelatedEventGroup(
-            group_id=f"mass_exception_{most_common_type}_{timestamp.strftime('%Y%m%d_%H%M')}",
+            group_id=f"mass_exception_{most_common_type}_{group_label}",
             correlation_type="pattern",
             pattern_type="mass_exception",
-            events=type_events,
+            events=list(type_events),
             bag_tags=bag_tags,
             location=most_common_location,
             confidence=confidence,
@@ -495,6 +825,30 @@ class EventCorrelationEngine:
 
         return group
 
+    def _record_patterns(self, patterns: List[CorrelatedEventGroup]):
+        """
+        Add detected patterns to the cache
+
+        A rescan that re-detects a pattern (same group_id) replaces the cached
+        entry in place and keeps its original detected_at, so the cache stays
+        ordered by detection time.
+        """
+        for pattern in patterns:
+            pattern.bag_bloom = _bag_bloom(pattern.bag_tags)
+
+            slot = self._pattern_slots.get(pattern.group_id)
+            if slot is not None:
+                position = slot - self._patterns_trimmed
+                pattern.detected_at = self.detected_patterns[position].detected_at
+                self.detected_patterns[position] = pattern
+                continue
+
+            self._pattern_slots[pattern.group_id] = (
+                self._patterns_trimmed + len(self.detected_patterns)
+            )
+            self.detected_patterns.append(pattern)
+            self._detected_at_epoch.append(pattern.detected_at.timestamp())
+
     def get_correlated_bags(
         self,
         bag_tag: str,
@@ -512,9 +866,14 @@ class EventCorrelationEngine:
         """
         correlated_bags: Set[str] = set()
 
-        # Search through detected patterns
+        # Search through detected patterns, skipping any whose Bloom filter
+        # rules the bag out before touching its bag_tags set. Patterns cached
+        # without going through _record_patterns get their filter built here.
+        bits = _bag_bloom_bits(bag_tag)
         for pattern in self.detected_patterns:
-            if bag_tag in pattern.bag_tags:
+            if not pattern.bag_bloom and pattern.bag_tags:
+                pattern.bag_bloom = _bag_bloom(pattern.bag_tags)
+            if pattern.bag_bloom & bits == bits and bag_tag in pattern.bag_tags:
                 if correlation_types is None or pattern.correlation_type in correlation_types:
                     correlated_bags.update(pattern.bag_tags)
 
@@ -541,12 +900,12 @@ class EventCorrelationEngine:
         priority_levels = {"LOW": 0, "MEDIUM": 1, "HIGH": 2, "CRITICAL": 3}
         min_level = priority_levels.get(min_priority, 1)
 
-        active = []
-        for pattern in self.detected_patterns:
-            # Check if pattern is still recent
-            if datetime.now() - pattern.detected_at > self.correlation_window * 2:
-                continue
+        # Only the tail detected within the last 2 windows is still recent
+        cutoff = (datetime.now() - self.correlation_window * 2).timestamp()
+        start = bisect.bisect_left(self._detected_at_epoch, cutoff)
 
+        active = []
+        for pattern in self.detected_patterns[start:]:
             # Check pattern type filter
             if pattern_type and pattern.pattern_type != pattern_type:
                 continue
@@ -560,63 +919,79 @@ class EventCorrelationEngine:
 
         return active
 
-    def _is_within_window(
-        self,
-        event: Dict[str, Any],
-        reference_time: datetime
-    ) -> bool:
-        """Check if event is within correlation window"""
-        try:
-            event_time = self._get_timestamp(event)
-            return abs((event_time - reference_time).total_seconds()) <= self.correlation_window.total_seconds()
-        except (ValueError, TypeError):
-            return False
+    @staticmethod
+    def _group_label(timestamp: datetime) -> str:
+        """Label of the groups detected on an event with this timestamp"""
+        return timestamp.strftime(GROUP_LABEL_FORMAT)
 
-    def _get_timestamp(self, event: Dict[str, Any]) -> datetime:
-        """Extract timestamp from event"""
-        timestamp_str = event.get('timestamp', '')
-        return datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+    @staticmethod
+    def _parse_timestamp(timestamp_str: str) -> datetime:
+        """Parse an ISO 8601 timestamp (Python 3.11+ accepts a 'Z' suffix as-is)"""
+        return datetime.fromisoformat(timestamp_str)
 
-    def _get_time_bucket(self, timestamp: datetime) -> str:
+    def _get_time_bucket(self, timestamp: datetime) -> int:
         """Get time bucket key for indexing"""
-        # Round to 15-minute buckets
-        minutes = (timestamp.minute // 15) * 15
-        bucket_time = timestamp.replace(minute=minutes, second=0, microsecond=0)
-        return bucket_time.strftime('%Y%m%d_%H%M')
+        # 15-minute buckets keyed by epoch bucket number (cheaper to hash than a string)
+        return int(timestamp.timestamp()) // TIME_BUCKET_SECONDS
+
+    @staticmethod
+    def _insert_by_time(events: Deque[Dict[str, Any]], event: Dict[str, Any]):
+        """Add event to an index deque, keeping the deque in timestamp order"""
+        if not events or events[-1]['ts_epoch'] <= event['ts_epoch']:
+            events.append(event)
+        else:
+            events.insert(bisect.bisect_right(events, event['ts_epoch'], key=_ts_epoch), event)
+
+    def _window_events(
+        self,
+        events: Deque[Dict[str, Any]],
+        ref_epoch: float
+    ) -> List[Dict[str, Any]]:
+        """Events of a timestamp-ordered deque within the correlation window of ref_epoch"""
+        start = bisect.bisect_left(events, ref_epoch - self._window_seconds, key=_ts_epoch)
+        end = bisect.bisect_right(events, ref_epoch + self._window_seconds, key=_ts_epoch)
+        if start == 0 and end == len(events):
+            return list(events)
+        return list(islice(events, start, end))
+
+    @staticmethod
+    def _evict(events: Deque[Dict[str, Any]], cutoff: float):
+        """Pop events at or before cutoff (epoch seconds) off the head of an index deque"""
+        while events and events[0]['ts_epoch'] <= cutoff:
+            events.popleft()
+
+    def _evict_bucket(self, time_bucket: int, cutoff: float):
+        """Head-evict a time bucket, keeping its pattern groupings in step"""
+        events = self.time_buckets[time_bucket]
+        aggregate = self._bucket_aggregates[time_bucket]
+        while events and events[0]['ts_epoch'] <= cutoff:
+            aggregate.remove(events.popleft())
 
     def _cleanup_old_events(self, current_time: datetime):
-        """Remove events older than 2x correlation window from indices"""
-        cutoff = current_time - (self.correlation_window * 2)
-
-        # Clean flight index
-        for flight, events in list(self.flight_index.items()):
-            self.flight_index[flight] = [
-                e for e in events
-                if self._get_timestamp(e) > cutoff
-            ]
-            if not self.flight_index[flight]:
-                del self.flight_index[flight]
-
-        # Clean location index
-        for location, events in list(self.location_index.items()):
-            self.location_index[location] = [
-                e for e in events
-                if self._get_timestamp(e) > cutoff
-            ]
-            if not self.location_index[location]:
-                del self.location_index[location]
-
-        # Clean time buckets
-        for bucket, events in list(self.time_buckets.items()):
-            self.time_buckets[bucket] = [
-                e for e in events
-                if self._get_timestamp(e) > cutoff
-            ]
-            if not self.time_buckets[bucket]:
-                del self.time_buckets[bucket]
-
-        # Clean detected patterns
-        self.detected_patterns = [
-            p for p in self.detected_patterns
-            if current_time - p.detected_at <= self.correlation_window * 3
-        ]
+        """Sweep events older than 2x correlation window from all indices"""
+        cutoff = current_time.timestamp() - self._window_seconds * 2
+
+        # Head eviction only touches expired events, then drop empty keys
+        for index in (self.flight_index, self.location_index):
+            for key, events in list(index.items()):
+                self._evict(events, cutoff)
+                if not events:
+                    del index[key]
+
+        for key in list(self.time_buckets):
+            self._evict_bucket(key, cutoff)
+            if not self.time_buckets[key]:
+                del self.time_buckets[key]
+                self._bucket_aggregates.pop(key, None)
+                self._bucket_last_scan_size.pop(key, None)
+
+        # Clean detected patterns (detected_at is wall-clock time)
+        pattern_cutoff = (datetime.now() - self.correlation_window * 3).timestamp()
+        expired = bisect.bisect_left(self._detected_at_epoch, pattern_cutoff)
+        if expired:
+            for pattern in self.detected_patterns[:expired]:
+                if self._pattern_slots.get(pattern.group_id) == self._patterns_trimmed:
+                    del self._pattern_slots[pattern.group_id]
+                self._patterns_trimmed += 1
+            del self.detected_patterns[:expired]
+            del self._detected_at_epoch[:expired]
@@ -9,20 +9,277 @@ Version: 1.0.0
 Date: 2024-11-13
 """
 
-from typing import List, Dict, Optional, Any
-from datetime import datetime, timedelta
+import sys
+from dataclasses import dataclass, field
+from functools import lru_cache
+from operator import itemgetter
+from typing import List, Dict, Optional, Any, Iterable, Tuple, FrozenSet
+from datetime import datetime, timedelta, timezone
+import numpy as np
 from loguru import logger
 
+from gateway.cache_manager import CacheManager, CacheConfig
 from models.event_ontology import (
     ScanEventType,
     ScanAnomaly,
     ValidationResult,
-    SequenceRule,
     SEQUENCE_RULES,
-    get_event_definition,
-    get_sequence_rule
+    get_event_definition
 )
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Exact (upper-cased) scan type values
+_SCAN_TYPE_BY_VALUE: Dict[str, ScanEventType] = {
+    event_type.value: event_type for event_type in ScanEventType
+}
+
+# Short forms seen from upstream feeds, pre-resolved into the type map
+_SCAN_TYPE_SYNONYMS = ("LOAD", "SORT", "OFFLOADED", "TRANSFERRED")
+
+# Cap on raw scan-type strings remembered by the type map
+TYPE_MAP_MAX_SIZE = 1024
+
+
+def _fuzzy_scan_type(scan_type_upper: str) -> Optional[ScanEventType]:
+    """Substring match of an upper-cased scan type against the enum values"""
+    for event_type in ScanEventType:
+        if event_type.value in scan_type_upper or scan_type_upper in event_type.value:
+            return event_type
+    return None
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_MICROSECOND = timedelta(microseconds=1)
+NS_PER_MINUTE = 60_000_000_000
+
+# Scans of the same type at the same location closer than this are duplicates
+DUPLICATE_WINDOW_NS = 5 * NS_PER_MINUTE
+
+# Distinct timestamp strings remembered by the parser
+TIMESTAMP_CACHE_SIZE = 65536
+
+# Bounds on the per-bag summaries kept by incrementally_validate: least
+# recently scanned bags are dropped beyond the size cap, and a summary
+# expires this long after the bag's first scan
+INCREMENTAL_STATE_MAX_BAGS = 100_000
+INCREMENTAL_STATE_TTL_SECONDS = 72 * 3600
+
+
+def _timestamp_ns(timestamp: Optional[str]) -> Optional[int]:
+    """
+    Parse an ISO 8601 timestamp to integer nanoseconds since the epoch
+
+    Naive timestamps are taken as UTC. Returns None when unparseable.
+    """
+    try:
+        parsed = datetime.fromisoformat(timestamp)
+    except (ValueError, TypeError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return (parsed - _EPOCH) // _ONE_MICROSECOND * 1000
+
+
+# Timestamp strings recur across bags (batch scans share a second) and across
+# repeat validations of the same history, so parsed values are memoized
+_cached_timestamp_ns = lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)(_timestamp_ns)
+
+
+def _event_timestamp_ns(event: Dict[str, Any]) -> Optional[int]:
+    """Parse one event's timestamp, through the memo when it is a string"""
+    timestamp = event.get('timestamp', '')
+    if type(timestamp) is str:
+        return _cached_timestamp_ns(timestamp)
+    return _timestamp_ns(timestamp)
+
+
+def _parse_timestamps_ns(events: List[Dict[str, Any]]) -> List[Optional[int]]:
+    """Parse every event's timestamp once, reusing the result for repeats"""
+    timestamps_ns: List[Optional[int]] = []
+    last_str: Optional[str] = None
+    last_ns: Optional[int] = None
+    for event in events:
+        timestamp = event.get('timestamp', '')
+        if timestamp != last_str:
+            if type(timestamp) is str:
+                last_ns = _cached_timestamp_ns(timestamp)
+            else:
+                last_ns = _timestamp_ns(timestamp)
+            last_str = timestamp
+        timestamps_ns.append(last_ns)
+    return timestamps_ns
+
+
+_get_timestamp = itemgetter('timestamp')
+
+
+def _chronological(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Events ordered by timestamp, skipping the sort when already in order"""
+    try:
+        timestamps = list(map(_get_timestamp, events))
+    except KeyError:
+        # Rare: some event has no timestamp, which sorts first as ''
+        timestamps = [event.get('timestamp', '') for event in events]
+    if all(timestamps[i] <= timestamps[i + 1] for i in range(len(timestamps) - 1)):
+        return events
+    order = sorted(range(len(events)), key=timestamps.__getitem__)
+    return [events[i] for i in order]
+
+
+# Bit position of each scan type in the seen-type bitmasks
+_TYPE_INDEX: Dict[ScanEventType, int] = {
+    event_type: i for i, event_type in enumerate(ScanEventType)
+}
+
+
+def _type_mask(event_types: Optional[Iterable[ScanEventType]]) -> int:
+    """Bitmask with the bit of each given scan type set"""
+    mask = 0
+    for event_type in event_types or ():
+        mask |= 1 << _TYPE_INDEX[event_type]
+    return mask
+
+
+def _types_in_mask(mask: int) -> List[ScanEventType]:
+    """Scan types whose bit is set in mask, in enum order"""
+    return [t for t, i in _TYPE_INDEX.items() if mask & (1 << i)]
+
+
+# Bit position of each anomaly in anomaly bitmasks
+_ANOMALY_INDEX: Dict[ScanAnomaly, int] = {
+    anomaly: i for i, anomaly in enumerate(ScanAnomaly)
+}
+_OUT_OF_SEQUENCE_BIT = 1 << _ANOMALY_INDEX[ScanAnomaly.OUT_OF_SEQUENCE]
+_TIME_GAP_BIT = 1 << _ANOMALY_INDEX[ScanAnomaly.TIME_GAP]
+_DUPLICATE_SCAN_BIT = 1 << _ANOMALY_INDEX[ScanAnomaly.DUPLICATE_SCAN]
+
+
+def _anomalies_in_mask(mask: int) -> List[ScanAnomaly]:
+    """Anomalies whose bit is set in mask, in enum order"""
+    return [a for a, i in _ANOMALY_INDEX.items() if mask & (1 << i)]
+
+
+# Confidence penalty per anomaly, indexed by bit position (0.1 if unlisted)
+_PENALTIES = {
+    ScanAnomaly.OUT_OF_SEQUENCE: 0.3,
+    ScanAnomaly.DUPLICATE_SCAN: 0.1,
+    ScanAnomaly.MISSING_EXPECTED: 0.2,
+    ScanAnomaly.UNEXPECTED_LOCATION: 0.1,
+    ScanAnomaly.TIME_GAP: 0.15,
+    ScanAnomaly.WRONG_FLIGHT: 0.25,
+    ScanAnomaly.ALREADY_CLAIMED: 0.4
+}
+_ANOMALY_PENALTY: Tuple[float, ...] = tuple(
+    _PENALTIES.get(anomaly, 0.1) for anomaly in _ANOMALY_INDEX
+)
+
+# Expected next scans at least this likely are reported as missing
+HIGH_PROBABILITY_EXPECTED = 0.8
+
+# Scan types a bag's history may start with
+_VALID_FIRST_SCANS = (ScanEventType.CHECKIN, ScanEventType.MANUAL, ScanEventType.EXCEPTION)
+
+
+def _scan_kernel(
+    types, timestamps_ns, timestamp_valid, duplicate_keys, offsets,
+    has_rule, must_follow_mask, cannot_follow_mask, max_gap_ns, min_gap_ns,
+    first_scan_mask, checks_missing, expected_mask, high_probability_expected,
+    anomaly_out, missing_out, duplicate_out
+):
+    """
+    Sequence checks of validate_sequence over many bags at once
+
+    Bag b owns events offsets[b]:offsets[b + 1]. Scan types are bit
+    positions (-1 for unknown) and all per-type tables are indexed by them.
+    Writes, per bag, the anomaly bitmask, missing-scan bitmask and number of
+    duplicate scans.
+    """
+    n_keys = 0
+    for i in range(duplicate_keys.shape[0]):
+        if duplicate_keys[i] + 1 > n_keys:
+            n_keys = duplicate_keys[i] + 1
+    last_bag = np.full(n_keys, -1, dtype=np.int64)
+    last_time = np.zeros(n_keys, dtype=np.int64)
+
+    for b in range(offsets.shape[0] - 1):
+        start = offsets[b]
+        end = offsets[b + 1]
+        seen = 0
+        anomalies = 0
+        missing = 0
+        duplicates = 0
+
+        for i in range(start, end):
+            t = types[i]
+
+            # Duplicate scans: same raw type and location within the window
+            if timestamp_valid[i]:
+                key = duplicate_keys[i]
+                if last_bag[key] == b and abs(timestamps_ns[i] - last_time[key]) < DUPLICATE_WINDOW_NS:
+                    duplicates += 1
+                last_bag[key] = b
+                last_time[key] = timestamps_ns[i]
+
+            if t < 0:
+                continue
+
+            if i == start:
+                if not (first_scan_mask >> t) & 1:
+                    anomalies |= _OUT_OF_SEQUENCE_BIT
+            else:
+                p = types[i - 1]
+                if has_rule[t] and p >= 0:
+                    if must_follow_mask[t] != 0 and (seen & must_follow_mask[t]) == 0:
+                        anomalies |= _OUT_OF_SEQUENCE_BIT
+                    elif (cannot_follow_mask[t] >> p) & 1:
+                        anomalies |= _OUT_OF_SEQUENCE_BIT
+
+                    if timestamp_valid[i] and timestamp_valid[i - 1]:
+                        gap = timestamps_ns[i] - timestamps_ns[i - 1]
+                        if max_gap_ns[t] > 0 and gap > max_gap_ns[t]:
+                            anomalies |= _TIME_GAP_BIT
+                        if min_gap_ns[t] > 0 and gap < min_gap_ns[t]:
+                            anomalies |= _OUT_OF_SEQUENCE_BIT
+
+                # Missing scans between the previous and this event
+                if p >= 0 and checks_missing[p] and not (expected_mask[p] >> t) & 1:
+                    for k in range(high_probability_expected.shape[1]):
+                        e = high_probability_expected[p, k]
+                        if e < 0:
+                            break
+                        if e != t and not (seen >> e) & 1:
+                            missing |= 1 << e
+
+            seen |= 1 << t
+
+        anomaly_out[b] = anomalies
+        missing_out[b] = missing
+        duplicate_out[b] = duplicates
+
+
+if NUMBA_AVAILABLE:
+    _scan_kernel = njit(cache=True)(_scan_kernel)
+
+
+@dataclass(slots=True)
+class _BagState:
+    """Running summary of one bag's scan history, advanced one event at a time"""
+    seen_mask: int = 0                      # scan types seen, over _TYPE_INDEX
+    anomaly_mask: int = 0                   # sequence/timing anomalies, over _ANOMALY_INDEX
+    missing_mask: int = 0                   # expected scans reported missing
+    event_count: int = 0
+    last_type: Optional[ScanEventType] = None  # None when the last scan type was unknown
+    last_ts_ns: Optional[int] = None
+    duplicate_count: int = 0
+    unknown_scans: int = 0
+    bad_timestamps: int = 0
+    # (raw scan type, location) -> time of the latest such scan
+    last_seen: Dict[Tuple[Any, Any], int] = field(default_factory=dict)
+
 
 class EventSequenceValidator:
     """
@@ -35,15 +292,143 @@ class EventSequenceValidator:
     - Validates timing between scans
     """
 
+    __slots__ = (
+        "sequence_rules",
+        "_type_map",
+        "_has_rule",
+        "_must_follow_mask",
+        "_cannot_follow_mask",
+        "_max_gap_ns",
+        "_min_gap_ns",
+        "_expected_types",
+        "_high_prob_expected",
+        "_expected_mask",
+        "_high_prob_mask",
+        "_next_expected_cache",
+        "_kernel_tables",
+        "_bag_state",
+    )
+
     def __init__(self):
         """Initialize validator"""
         self.sequence_rules = SEQUENCE_RULES
+
+        # Raw scan-type string -> enum (None for strings known not to match).
+        # Seeded with the canonical values and their common spellings; other
+        # strings are resolved once and written back.
+        self._type_map: Dict[str, Optional[ScanEventType]] = {}
+        for event_type in ScanEventType:
+            for spelling in (event_type.value, event_type.value.lower(), event_type.value.title()):
+                self._type_map[sys.intern(spelling)] = event_type
+        for synonym in _SCAN_TYPE_SYNONYMS:
+            for spelling in (synonym, synonym.lower(), synonym.title()):
+                self._type_map[sys.intern(spelling)] = _fuzzy_scan_type(synonym)
+
+        # Sequence rules compiled to predecessor bitmasks, indexed by the
+        # scan type's bit position. A sequence check is then one AND against
+        # the running mask of scan types seen so far.
+        # The timing limits are flattened the same way, as integer ns (0
+        # where the rule sets no limit), so the per-event checks never touch
+        # the pydantic rule objects.
+        n_types = len(_TYPE_INDEX)
+        self._has_rule: List[bool] = [False] * n_types
+        self._must_follow_mask: List[int] = [0] * n_types
+        self._cannot_follow_mask: List[int] = [0] * n_types
+        self._max_gap_ns: List[int] = [0] * n_types
+        self._min_gap_ns: List[int] = [0] * n_types
+        for event_type, rule in self.sequence_rules.items():
+            idx = _TYPE_INDEX[event_type]
+            self._has_rule[idx] = True
+            self._must_follow_mask[idx] = _type_mask(rule.must_follow)
+            self._cannot_follow_mask[idx] = _type_mask(rule.cannot_follow)
+            self._max_gap_ns[idx] = (rule.max_time_since_previous or 0) * NS_PER_MINUTE
+            self._min_gap_ns[idx] = (rule.min_time_since_previous or 0) * NS_PER_MINUTE
+
+        # Static ontology lookups for the missing-scan check. Only types that
+        # have expected next scans get an entry.
+        self._expected_types: Dict[ScanEventType, FrozenSet[ScanEventType]] = {}
+        self._high_prob_expected: Dict[ScanEventType, Tuple[Tuple[ScanEventType, float], ...]] = {}
+        for event_type in ScanEventType:
+            definition = get_event_definition(event_type)
+            if not definition or not definition.semantic_enrichment.expected_next_scans:
+                continue
+            expected_scans = definition.semantic_enrichment.expected_next_scans
+            self._expected_types[event_type] = frozenset(
+                [exp.scan_type for exp in expected_scans]
+                + [alt for exp in expected_scans for alt in exp.alternative_scans]
+            )
+            self._high_prob_expected[event_type] = tuple(
+                (exp.scan_type, exp.probability)
+                for exp in expected_scans
+                if exp.probability > HIGH_PROBABILITY_EXPECTED
+            )
+
+        # The same lookups as type bitmasks indexed by bit position, for the
+        # per-event check (0 where the ontology expects nothing)
+        self._expected_mask: List[int] = [0] * n_types
+        self._high_prob_mask: List[int] = [0] * n_types
+        for event_type, expected_types in self._expected_types.items():
+            idx = _TYPE_INDEX[event_type]
+            self._expected_mask[idx] = _type_mask(expected_types)
+            self._high_prob_mask[idx] = _type_mask(
+                scan_type for scan_type, _ in self._high_prob_expected[event_type]
+            )
+
+        self._next_expected_cache: Dict[ScanEventType, List[Dict[str, Any]]] = {}
+
+        self._kernel_tables = self._build_kernel_tables()
+
+        # Per-bag summaries for incrementally_validate
+        self._bag_state = CacheManager(
+            "incremental_validation",
+            CacheConfig(
+                max_size=INCREMENTAL_STATE_MAX_BAGS,
+                default_ttl_seconds=INCREMENTAL_STATE_TTL_SECONDS
+            )
+        )
+
         logger.info("EventSequenceValidator initialized")
 
+    def _build_kernel_tables(self) -> tuple:
+        """Flatten rules and ontology into the per-type arrays _scan_kernel reads"""
+        n_types = len(_TYPE_INDEX)
+        has_rule = np.array(self._has_rule, dtype=np.bool_)
+        max_gap_ns = np.array(self._max_gap_ns, dtype=np.int64)
+        min_gap_ns = np.array(self._min_gap_ns, dtype=np.int64)
+
+        checks_missing = np.zeros(n_types, dtype=np.bool_)
+        expected_mask = np.zeros(n_types, dtype=np.int64)
+        high_probability = [[] for _ in range(n_types)]
+        for event_type in self._expected_types:
+            idx = _TYPE_INDEX[event_type]
+            checks_missing[idx] = True
+            expected_mask[idx] = self._expected_mask[idx]
+            high_probability[idx] = [
+                _TYPE_INDEX[scan_type] for scan_type, _ in self._high_prob_expected[event_type]
+            ]
+
+        width = max(1, max(len(row) for row in high_probability))
+        high_probability_expected = np.full((n_types, width), -1, dtype=np.int32)
+        for idx, row in enumerate(high_probability):
+            high_probability_expected[idx, :len(row)] = row
+
+        return (
+            has_rule,
+            np.array(self._must_follow_mask, dtype=np.int64),
+            np.array(self._cannot_follow_mask, dtype=np.int64),
+            max_gap_ns,
+            min_gap_ns,
+            _type_mask(_VALID_FIRST_SCANS),
+            checks_missing,
+            expected_mask,
+            high_probability_expected,
+        )
+
     def validate_sequence(
         self,
         events: List[Dict[str, Any]],
-        bag_tag: str
+        bag_tag: str,
+        early_exit: bool = False
     ) -> ValidationResult:
         """
         Validate a sequence of scan events for a bag
@@ -51,6 +436,8 @@ class EventSequenceValidator:
         Args:
             events: List of scan events (must be chronologically ordered)
             bag_tag: Baggage tag number
+            early_exit: Stop as soon as confidence reaches 0.0. The verdict
+                is then final but the anomaly/missing-scan lists are partial.
 
         Returns:
             ValidationResult with validation details
@@ -64,56 +451,241 @@ class EventSequenceValidator:
                 reasoning="No scan events found for bag"
             )
 
-        anomalies: List[ScanAnomaly] = []
-        missing_scans: List[ScanEventType] = []
-        reasoning_parts: List[str] = []
+        # Ingest normally delivers events in order; sort only when it didn't
+        sorted_events = _chronological(events)
 
-        # Sort events by timestamp to ensure chronological order
-        sorted_events = sorted(events, key=lambda e: e.get('timestamp', ''))
+        logger.debug("Validating sequence for bag {} with {} events", bag_tag, len(sorted_events))
 
-        logger.info(f"Validating sequence for bag {bag_tag} with {len(sorted_events)} events")
+        # Parse every timestamp once up front; the checks below use int ns
+        timestamps_ns = _parse_timestamps_ns(sorted_events)
 
-        # Validate each event in sequence
-        for i, event in enumerate(sorted_events):
-            event_type = self._parse_event_type(event.get('scan_type'))
+        # Feed the events through the same step incrementally_validate uses
+        state = _BagState()
+        stopped_early = False
+        for event, timestamp_ns in zip(sorted_events, timestamps_ns):
+            self._advance(state, event, timestamp_ns)
 
-            if not event_type:
-                logger.warning(f"Unknown scan type: {event.get('scan_type')}")
-                continue
+            # Nothing later can make the sequence valid again
+            if early_exit and self._calculate_confidence(
+                state.anomaly_mask, state.missing_mask.bit_count()
+            ) <= 0.0:
+                stopped_early = True
+                break
+
+        self._log_scan_issues(bag_tag, state)
+        return self._state_result(bag_tag, state, stopped_early)
+
+    def incrementally_validate(
+        self,
+        bag_tag: str,
+        new_event: Dict[str, Any],
+        history: Optional[List[Dict[str, Any]]] = None
+    ) -> ValidationResult:
+        """
+        Validate a bag's history after one more scan arrives
 
-            # Get previous event if exists
-            previous_event = sorted_events[i - 1] if i > 0 else None
+        Keeps a running summary per bag, so each call costs O(1) instead of
+        revalidating the whole history. Scans must be fed in chronological
+        order; the result matches validate_sequence over all scans fed so far.
 
-            # Validate this event against previous
-            event_anomalies = self._validate_single_event(
-                event,
+        Summaries are bounded by INCREMENTAL_STATE_MAX_BAGS and
+        INCREMENTAL_STATE_TTL_SECONDS. When the bag has no summary (never
+        seen, or dropped), history is replayed to rebuild it before
+        new_event is applied, so the result still covers the whole journey.
+
+        Args:
+            bag_tag: Bag tag
+            new_event: The scan that just arrived
+            history: The bag's earlier scans, used only when no summary is
+                cached. Without it, a dropped bag starts over from new_event.
+
+        Returns:
+            ValidationResult over every scan of the bag
+        """
+        state = self._bag_state.get(bag_tag)
+        if state is None:
+            state = _BagState()
+            if history:
+                earlier_events = _chronological(history)
+                for event, timestamp_ns in zip(earlier_events, _parse_timestamps_ns(earlier_events)):
+                    self._advance(state, event, timestamp_ns)
+            self._bag_state.set(bag_tag, state)
+
+        self._advance(state, new_event, _event_timestamp_ns(new_event))
+        return self._state_result(bag_tag, state)
+
+    def reset_incremental_state(self, bag_tag: Optional[str] = None) -> None:
+        """Drop the running summary for one bag, or for all bags"""
+        if bag_tag is None:
+            self._bag_state.clear()
+        else:
+            self._bag_state.delete(bag_tag)
+
+    def _advance(
+        self,
+        state: _BagState,
+        event: Dict[str, Any],
+        timestamp_ns: Optional[int]
+    ) -> None:
+        """Fold one event into a bag's running summary"""
+        has_previous = state.event_count > 0
+        prev_type = state.last_type
+        previous_ns = state.last_ts_ns
+        event_type = self._parse_event_type(event.get('scan_type'))
+        state.event_count += 1
+        state.last_type = event_type
+        state.last_ts_ns = timestamp_ns
+
+        # Duplicate scans: only the latest scan with the same type and
+        # location can fall within the window
+        if timestamp_ns is None:
+            state.bad_timestamps += 1
+        else:
+            key = (event.get('scan_type'), event.get('location', ''))
+            last_time = state.last_seen.get(key)
+            if last_time is not None and abs(timestamp_ns - last_time) < DUPLICATE_WINDOW_NS:
+                state.duplicate_count += 1
+            state.last_seen[key] = timestamp_ns
+
+        if not event_type:
+            state.unknown_scans += 1
+            return
+
+        # Validate this event against previous
+        state.anomaly_mask |= self._validate_single_event(
+            event_type,
+            has_previous,
+            prev_type,
+            state.seen_mask,
+            timestamp_ns,
+            previous_ns
+        )
+
+        # Check for missing expected scans
+        if prev_type:
+            state.missing_mask |= self._check_missing_scans(
+                prev_type,
                 event_type,
-                previous_event,
-                sorted_events[:i]  # All previous events
+                state.seen_mask
+            )
+
+        state.seen_mask |= 1 << _TYPE_INDEX[event_type]
+
+    def _state_result(
+        self,
+        bag_tag: str,
+        state: _BagState,
+        stopped_early: bool = False
+    ) -> ValidationResult:
+        """Build the ValidationResult for a bag's running summary"""
+        anomaly_mask = state.anomaly_mask
+        # An early stop skips the duplicate check, as its verdict is final
+        if state.duplicate_count and not stopped_early:
+            anomaly_mask |= _DUPLICATE_SCAN_BIT
+        return self._build_result(bag_tag, anomaly_mask, state.missing_mask, stopped_early)
+
+    @staticmethod
+    def _log_scan_issues(bag_tag: str, state: _BagState) -> None:
+        """Summarise per-event findings in one line per bag"""
+        if state.unknown_scans or state.duplicate_count or state.bad_timestamps:
+            logger.warning(
+                "Scan issues for {}: {} unknown scan types, {} duplicate scans, {} unparseable timestamps",
+                bag_tag, state.unknown_scans, state.duplicate_count, state.bad_timestamps
             )
 
-            anomalies.extend(event_anomalies)
+    def validate_many(
+        self,
+        events_per_bag: Dict[str, List[Dict[str, Any]]]
+    ) -> Dict[str, ValidationResult]:
+        """
+        Validate the scan sequences of many bags in one batch
 
-            # Check for missing expected scans
-            if previous_event:
-                missing = self._check_missing_scans(
-                    previous_event,
-                    event,
-                    sorted_events[:i]
-                )
-                missing_scans.extend(missing)
+        Produces the same verdicts as validate_sequence for each bag, but
+        runs the sequence checks for the whole batch in one compiled pass
+        (numba). Without numba it falls back to validate_sequence per bag.
 
-        # Check for duplicate scans
-        duplicates = self._detect_duplicates(sorted_events)
-        if duplicates:
-            anomalies.append(ScanAnomaly.DUPLICATE_SCAN)
-            reasoning_parts.append(f"Found {len(duplicates)} duplicate scans")
+        Args:
+            events_per_bag: Scan events keyed by bag tag
+
+        Returns:
+            ValidationResult per bag tag
+        """
+        if not NUMBA_AVAILABLE:
+            return {
+                bag_tag: self.validate_sequence(events, bag_tag)
+                for bag_tag, events in events_per_bag.items()
+            }
+
+        results: Dict[str, ValidationResult] = {}
+        bag_tags: List[str] = []
+        types: List[int] = []
+        timestamps: List[Optional[int]] = []
+        duplicate_keys: List[int] = []
+        key_ids: Dict[Tuple[Any, Any], int] = {}
+        offsets = [0]
+
+        # Encode every bag's sorted events into flat arrays
+        for bag_tag, events in events_per_bag.items():
+            if not events:
+                results[bag_tag] = self.validate_sequence(events, bag_tag)
+                continue
+
+            sorted_events = _chronological(events)
+            for event in sorted_events:
+                event_type = self._parse_event_type(event.get('scan_type'))
+                types.append(_TYPE_INDEX[event_type] if event_type else -1)
+                key = (event.get('scan_type'), event.get('location', ''))
+                duplicate_keys.append(key_ids.setdefault(key, len(key_ids)))
+            timestamps.extend(_parse_timestamps_ns(sorted_events))
+            bag_tags.append(bag_tag)
+            offsets.append(len(types))
+
+        if not bag_tags:
+            return results
+
+        timestamp_valid = np.array([ts is not None for ts in timestamps], dtype=np.bool_)
+        timestamps_ns = np.array([ts or 0 for ts in timestamps], dtype=np.int64)
+        anomaly_masks = np.zeros(len(bag_tags), dtype=np.int64)
+        missing_masks = np.zeros(len(bag_tags), dtype=np.int64)
+        duplicate_counts = np.zeros(len(bag_tags), dtype=np.int64)
+
+        _scan_kernel(
+            np.array(types, dtype=np.int32),
+            timestamps_ns,
+            timestamp_valid,
+            np.array(duplicate_keys, dtype=np.int64),
+            np.array(offsets, dtype=np.int64),
+            *self._kernel_tables,
+            anomaly_masks,
+            missing_masks,
+            duplicate_counts
+        )
+
+        for b, bag_tag in enumerate(bag_tags):
+            anomaly_mask = int(anomaly_masks[b])
+            if duplicate_counts[b]:
+                anomaly_mask |= _DUPLICATE_SCAN_BIT
+            results[bag_tag] = self._build_result(bag_tag, anomaly_mask, int(missing_masks[b]))
+
+        # Keep the caller's bag order
+        return {bag_tag: results[bag_tag] for bag_tag in events_per_bag}
+
+    def _build_result(
+        self,
+        bag_tag: str,
+        anomaly_mask: int,
+        missing_mask: int,
+        stopped_early: bool = False
+    ) -> ValidationResult:
+        """Assemble the ValidationResult for a bag's collected findings"""
+        anomalies = _anomalies_in_mask(anomaly_mask)
+        missing_scans = _types_in_mask(missing_mask)
 
         # Determine if sequence is valid
         is_valid = len(anomalies) == 0 and len(missing_scans) == 0
 
         # Calculate confidence based on anomalies
-        confidence = self._calculate_confidence(anomalies, missing_scans)
+        confidence = self._calculate_confidence(anomaly_mask, len(missing_scans))
 
         # Build reasoning
         if is_valid:
@@ -124,225 +696,142 @@ class EventSequenceValidator:
                 reasoning_parts.append(f"Detected {len(anomalies)} anomalies: {', '.join([a.value for a in anomalies])}")
             if missing_scans:
                 reasoning_parts.append(f"Missing {len(missing_scans)} expected scans: {', '.join([s.value for s in missing_scans])}")
+            if stopped_early:
+                reasoning_parts.append("Validation stopped early")
             reasoning = ". ".join(reasoning_parts)
 
-        logger.info(f"Validation complete for {bag_tag}: valid={is_valid}, anomalies={len(anomalies)}, confidence={confidence}")
+        logger.info(
+            "Validation complete for {}: valid={}, anomalies={}, missing_scans={}, confidence={}",
+            bag_tag, is_valid, len(anomalies), len(missing_scans), confidence
+        )
 
         return ValidationResult(
             is_valid=is_valid,
-            anomalies=list(set(anomalies)),  # Remove duplicates
-            missing_scans=list(set(missing_scans)),
+            anomalies=anomalies,
+            missing_scans=missing_scans,
             confidence=confidence,
             reasoning=reasoning
         )
 
     def _validate_single_event(
         self,
-        event: Dict[str, Any],
         event_type: ScanEventType,
-        previous_event: Optional[Dict[str, Any]],
-        all_previous: List[Dict[str, Any]]
-    ) -> List[ScanAnomaly]:
-        """Validate a single event against sequence rules"""
-        anomalies: List[ScanAnomaly] = []
+        has_previous: bool,
+        prev_type: Optional[ScanEventType],
+        seen_mask: int,
+        current_ns: Optional[int],
+        previous_ns: Optional[int]
+    ) -> int:
+        """
+        Validate a single event against sequence rules (returns an anomaly bitmask)
+
+        prev_type is None when there is no previous event or its scan type
+        could not be parsed; has_previous tells the two apart.
+        """
+        anomalies = 0
 
-        if not previous_event:
+        if not has_previous:
             # First event - validate it's a valid starting point
-            if event_type not in [
-                ScanEventType.CHECKIN,
-                ScanEventType.MANUAL,
-                ScanEventType.EXCEPTION
-            ]:
-                anomalies.append(ScanAnomaly.OUT_OF_SEQUENCE)
-                logger.warning(f"Invalid first scan: {event_type.value}")
+            if event_type not in _VALID_FIRST_SCANS:
+                anomalies |= _OUT_OF_SEQUENCE_BIT
             return anomalies
 
-        # Get sequence rule for this event type
-        rule = get_sequence_rule(event_type)
-        if not rule:
+        idx = _TYPE_INDEX[event_type]
+        if not self._has_rule[idx]:
             # No rule defined, assume valid
             return anomalies
 
-        # Get previous event type
-        prev_type = self._parse_event_type(previous_event.get('scan_type'))
+        # Previous scan type unknown: nothing to check against
         if not prev_type:
             return anomalies
 
         # Check must_follow rule
-        if rule.must_follow:
-            prev_types_in_history = [
-                self._parse_event_type(e.get('scan_type'))
-                for e in all_previous
-            ]
-            if not any(req_type in prev_types_in_history for req_type in rule.must_follow):
-                anomalies.append(ScanAnomaly.OUT_OF_SEQUENCE)
-                logger.warning(
-                    f"{event_type.value} requires one of {[t.value for t in rule.must_follow]} "
-                    f"but found {[t.value for t in prev_types_in_history if t]}"
-                )
-
-        # Check cannot_follow rule
-        if rule.cannot_follow and prev_type in rule.cannot_follow:
-            anomalies.append(ScanAnomaly.OUT_OF_SEQUENCE)
-            logger.warning(f"{event_type.value} cannot follow {prev_type.value}")
+        must_follow = self._must_follow_mask[idx]
+        if must_follow and not (seen_mask & must_follow):
+            anomalies |= _OUT_OF_SEQUENCE_BIT
+
+        # Check cannot_follow rule (skipped once the event is already out of
+        # sequence, as it can only add the same anomaly)
+        elif self._cannot_follow_mask[idx] & (1 << _TYPE_INDEX[prev_type]):
+            anomalies |= _OUT_OF_SEQUENCE_BIT
 
         # Check timing constraints
-        time_anomalies = self._validate_timing(
-            event,
-            previous_event,
-            rule
+        anomalies |= self._validate_timing(
+            current_ns,
+            previous_ns,
+            idx
         )
-        anomalies.extend(time_anomalies)
 
         return anomalies
 
     def _validate_timing(
         self,
-        event: Dict[str, Any],
-        previous_event: Dict[str, Any],
-        rule: SequenceRule
-    ) -> List[ScanAnomaly]:
-        """Validate timing between events"""
-        anomalies: List[ScanAnomaly] = []
-
-        try:
-            current_time = datetime.fromisoformat(event.get('timestamp', '').replace('Z', '+00:00'))
-            previous_time = datetime.fromisoformat(previous_event.get('timestamp', '').replace('Z', '+00:00'))
-
-            time_diff_minutes = (current_time - previous_time).total_seconds() / 60
-
-            # Check max time constraint
-            if rule.max_time_since_previous and time_diff_minutes > rule.max_time_since_previous:
-                anomalies.append(ScanAnomaly.TIME_GAP)
-                logger.warning(
-                    f"Time gap of {time_diff_minutes:.1f} minutes exceeds maximum "
-                    f"of {rule.max_time_since_previous} minutes"
-                )
-
-            # Check min time constraint
-            if rule.min_time_since_previous and time_diff_minutes < rule.min_time_since_previous:
-                anomalies.append(ScanAnomaly.OUT_OF_SEQUENCE)
-                logger.warning(
-                    f"Time gap of {time_diff_minutes:.1f} minutes is less than minimum "
-                    f"of {rule.min_time_since_previous} minutes"
-                )
-
-        except (ValueError, TypeError) as e:
-            logger.error(f"Error parsing timestamps: {e}")
+        current_ns: Optional[int],
+        previous_ns: Optional[int],
+        idx: int
+    ) -> int:
+        """Validate timing between events (epoch-ns timestamps, returns an anomaly bitmask)"""
+        anomalies = 0
+
+        # Unparseable timestamps are reported in validate_sequence's summary
+        if current_ns is None or previous_ns is None:
+            return anomalies
 
-        return anomalies
+        time_diff_ns = current_ns - previous_ns
 
-    def _check_missing_scans(
-        self,
-        previous_event: Dict[str, Any],
-        current_event: Dict[str, Any],
-        all_previous: List[Dict[str, Any]]
-    ) -> List[ScanEventType]:
-        """Check for missing expected scans between events"""
-        missing: List[ScanEventType] = []
-
-        prev_type = self._parse_event_type(previous_event.get('scan_type'))
-        if not prev_type:
-            return missing
+        # Check max time constraint
+        max_gap_ns = self._max_gap_ns[idx]
+        if max_gap_ns and time_diff_ns > max_gap_ns:
+            anomalies |= _TIME_GAP_BIT
 
-        # Get expected next scans from ontology
-        prev_definition = get_event_definition(prev_type)
-        if not prev_definition:
-            return missing
+        # Check min time constraint
+        min_gap_ns = self._min_gap_ns[idx]
+        if min_gap_ns and time_diff_ns < min_gap_ns:
+            anomalies |= _OUT_OF_SEQUENCE_BIT
 
-        expected_scans = prev_definition.semantic_enrichment.expected_next_scans
+        return anomalies
 
-        # Get current event type
-        current_type = self._parse_event_type(current_event.get('scan_type'))
-        if not current_type:
+    def _check_missing_scans(
+        self,
+        prev_type: ScanEventType,
+        current_type: ScanEventType,
+        seen_mask: int
+    ) -> int:
+        """Check for missing expected scans between events (returns a scan-type bitmask)"""
+        missing = 0
+
+        # Expected next scans (and alternatives) from the ontology
+        prev_idx = _TYPE_INDEX[prev_type]
+        expected_mask = self._expected_mask[prev_idx]
+        if not expected_mask:
             return missing
 
-        # Check if current scan is in expected list
-        expected_types = [exp.scan_type for exp in expected_scans]
-
-        # Also include alternative scans
-        for exp in expected_scans:
-            expected_types.extend(exp.alternative_scans)
-
-        if current_type not in expected_types and expected_scans:
-            # Current scan not in expected list
-            # Check if it's a high-probability expected scan that's missing
-            for expected in expected_scans:
-                if expected.probability > 0.8 and expected.scan_type != current_type:
-                    # Check if this expected scan already occurred
-                    prev_scan_types = [
-                        self._parse_event_type(e.get('scan_type'))
-                        for e in all_previous
-                    ]
-                    if expected.scan_type not in prev_scan_types:
-                        missing.append(expected.scan_type)
-                        logger.info(
-                            f"Expected {expected.scan_type.value} (prob={expected.probability}) "
-                            f"between {prev_type.value} and {current_type.value}"
-                        )
+        current_bit = 1 << _TYPE_INDEX[current_type]
+        if not expected_mask & current_bit:
+            # Current scan not in expected list: report the high-probability
+            # expected scans (other than this one) that haven't occurred yet
+            missing = self._high_prob_mask[prev_idx] & ~(seen_mask | current_bit)
 
         return missing
 
-    def _detect_duplicates(
-        self,
-        events: List[Dict[str, Any]]
-    ) -> List[Dict[str, Any]]:
-        """Detect duplicate scans"""
-        duplicates: List[Dict[str, Any]] = []
-        seen: Dict[str, List[datetime]] = {}
-
-        for event in events:
-            event_type = event.get('scan_type')
-            location = event.get('location', '')
-            timestamp = event.get('timestamp', '')
-
-            try:
-                event_time = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            except (ValueError, TypeError):
-                continue
-
-            key = f"{event_type}:{location}"
-
-            if key in seen:
-                # Check if this is a duplicate (within 5 minutes)
-                for prev_time in seen[key]:
-                    if abs((event_time - prev_time).total_seconds()) < 300:
-                        duplicates.append(event)
-                        logger.warning(f"Duplicate scan detected: {key} at {timestamp}")
-                        break
-
-            if key not in seen:
-                seen[key] = []
-            seen[key].append(event_time)
-
-        return duplicates
-
     def _calculate_confidence(
         self,
-        anomalies: List[ScanAnomaly],
-        missing_scans: List[ScanEventType]
+        anomaly_mask: int,
+        missing_count: int
     ) -> float:
         """Calculate confidence in validation result"""
         # Start with perfect confidence
         confidence = 1.0
 
-        # Reduce confidence for each anomaly
-        anomaly_penalties = {
-            ScanAnomaly.OUT_OF_SEQUENCE: 0.3,
-            ScanAnomaly.DUPLICATE_SCAN: 0.1,
-            ScanAnomaly.MISSING_EXPECTED: 0.2,
-            ScanAnomaly.UNEXPECTED_LOCATION: 0.1,
-            ScanAnomaly.TIME_GAP: 0.15,
-            ScanAnomaly.WRONG_FLIGHT: 0.25,
-            ScanAnomaly.ALREADY_CLAIMED: 0.4
-        }
-
-        for anomaly in anomalies:
-            penalty = anomaly_penalties.get(anomaly, 0.1)
-            confidence -= penalty
+        # Reduce confidence for each anomaly, lowest bit first
+        penalty_by_bit = _ANOMALY_PENALTY
+        while anomaly_mask:
+            bit = anomaly_mask & -anomaly_mask
+            anomaly_mask ^= bit
+            confidence -= penalty_by_bit[bit.bit_length() - 1]
 
         # Reduce confidence for missing scans
-        confidence -= len(missing_scans) * 0.1
+        confidence -= missing_count * 0.1
 
         # Ensure confidence stays in valid range
         return max(0.0, min(1.0, confidence))
@@ -352,34 +841,38 @@ class EventSequenceValidator:
         if not scan_type:
             return None
 
-        try:
-            # Try direct match
-            return ScanEventType(scan_type.upper())
-        except ValueError:
-            # Try fuzzy match
-            scan_type_upper = scan_type.upper()
-            for event_type in ScanEventType:
-                if event_type.value in scan_type_upper or scan_type_upper in event_type.value:
-                    return event_type
-            return None
+        type_map = self._type_map
+        if scan_type in type_map:
+            return type_map[scan_type]
+
+        # Cold path: exact match on the upper-cased value, then fuzzy match
+        scan_type_upper = scan_type.upper()
+        event_type = _SCAN_TYPE_BY_VALUE.get(scan_type_upper) or _fuzzy_scan_type(scan_type_upper)
+        if len(type_map) < TYPE_MAP_MAX_SIZE:
+            type_map[sys.intern(scan_type)] = event_type
+        return event_type
 
     def get_next_expected_scans(
         self,
         last_event_type: ScanEventType
     ) -> List[Dict[str, Any]]:
         """Get expected next scans for a given event type"""
-        definition = get_event_definition(last_event_type)
-        if not definition:
-            return []
-
-        expected = []
-        for next_scan in definition.semantic_enrichment.expected_next_scans:
-            expected.append({
-                "scan_type": next_scan.scan_type.value,
-                "location_type": next_scan.location_type.value,
-                "time_window_minutes": next_scan.time_window_minutes,
-                "probability": next_scan.probability,
-                "alternatives": [alt.value for alt in next_scan.alternative_scans]
-            })
-
-        return expected
+        expected = self._next_expected_cache.get(last_event_type)
+        if expected is None:
+            definition = get_event_definition(last_event_type)
+            if not definition:
+                return []
+
+            expected = []
+            for next_scan in definition.semantic_enrichment.expected_next_scans:
+                expected.append({
+                    "scan_type": next_scan.scan_type.value,
+                    "location_type": next_scan.location_type.value,
+                    "time_window_minutes": next_scan.time_window_minutes,
+                    "probability": next_scan.probability,
+                    "alternatives": [alt.value for alt in next_scan.alternative_scans]
+                })
+            self._next_expected_cache[last_event_type] = expected
+
+        # Hand out copies so callers cannot mutate the cache
+        return [{**scan, "alternatives": list(scan["alternatives"])} for scan in expected]